@@ -1,121 +1,382 @@
 import csv
+import io
+import os
 import re
-import json
 import datetime
-from flask import Flask, render_template, request, redirect, url_for, Response
-from collections import defaultdict
+import threading
+import time
+from contextlib import contextmanager
+from flask import Flask, render_template, request, redirect, url_for, Response, jsonify
+from hierarchy import HierarchyIndex, diff_hierarchies, file_etag, load_hierarchy_csv
+import metrics
+from export import (ExportCache, assignment_delta, assignments_digest, build_assignments,
+                    delta_zip, iter_assignments, iter_csv, read_snapshot, snapshot_writer,
+                    write_snapshot)
+from registry import SORT_KEYS, ContactRegistry, primary_scope
+from storage import CONTACTS_FIELDS, open_store
+from typeahead import KINDS, TypeaheadIndex
 
 app = Flask(__name__)
+metrics.init_app(app)  # First, so request timing covers the other hooks
 app.secret_key = 'your_secret_key_here'
 
 # In-memory data stores
-contacts = []
-nodes = []
-hierarchy_tree = defaultdict(list)
-course_prefix_map = defaultdict(list)
-college_depts = defaultdict(list)  # College to departments mapping
-CONTACTS_CSV = 'contacts.csv'
-CONTACTS_FIELDS = [
-    'id', 'linkblue', 'first_name', 'last_name', 'primary_contact',
-    'contact_type', 'college', 'department', 'course', 'prefix', 'level_type'
-]
-def load_hierarchy():
-    global nodes, hierarchy_tree, course_prefix_map, college_depts
-    with open('hierarchy.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            node = {
-                'node_id': row['Node Id'],
-                'caption': row['Node Caption'],
-                'parent_id': row['Parent Node Id'],
-                'level': int(row['Level']),
-                'course_no': row['CourseNo'] if row['Level'] == '4' else None
-            }
-            
-            # Build college-department relationships
-            if node['level'] == 3:  # Department level
-                parent_college = next((n for n in nodes if n['node_id'] == node['parent_id']), None)
-                if parent_college:
-                    college_depts[parent_college['caption']].append(node['caption'])
-            
-            if node['level'] == 4:
-                parts = node['caption'].split(' ', 1)
-                node['prefix'] = parts[0] if len(parts) > 1 else ''
-                node['course_num'] = parts[1] if len(parts) > 1 else node['caption']
-                course_prefix_map[node['prefix']].append(node)
-            
-            nodes.append(node)
-            hierarchy_tree[node['parent_id']].append(node)
+contacts = ContactRegistry()  # Contacts keyed by stable id, see registry.py; replaced, never edited in place
+contacts_version = 0  # Bumped on every save so cached results can tell they are stale
+contacts_lock = threading.Lock()  # One writer at a time in this process (store.lock() covers other processes)
+export_cache = ExportCache()
+hierarchy = HierarchyIndex()  # Nodes plus O(1) lookup indexes and typeahead, see hierarchy.py
+typeahead_lock = threading.Lock()  # One typeahead build at a time, see hierarchy_typeahead
+HIERARCHY_CSV = os.environ.get('HIERARCHY_CSV', 'hierarchy.csv')
+# How often (seconds) requests check hierarchy.csv for changes; 0 turns the check off
+HIERARCHY_CHECK_SECONDS = float(os.environ.get('HIERARCHY_CHECK_SECONDS', '2'))
+hierarchy_reload_lock = threading.Lock()  # One reload at a time; requests never wait on it
+hierarchy_checked = 0.0
+CONTACTS_CSV = os.environ.get('CONTACTS_CSV', 'contacts.csv')
+EXPORT_SNAPSHOT = os.environ.get('EXPORT_SNAPSHOT', 'export_snapshot.csv')  # Rows of the last export, the base for delta exports
+# Set CONTACTS_BACKEND=sqlite to keep contacts in CONTACTS_DB instead of the CSV
+# (import the existing file first with: python storage.py import)
+CONTACTS_BACKEND = os.environ.get('CONTACTS_BACKEND', 'csv')
+CONTACTS_DB = os.environ.get('CONTACTS_DB', 'contacts.db')
+store = None
+def load_hierarchy(path=None):
+    global hierarchy
+    with metrics.timer('hierarchy_load'):
+        loaded = load_hierarchy_csv(path or HIERARCHY_CSV)
+    # A single assignment swaps the nodes and indexes together; requests that
+    # already hold the old index finish with it
+    hierarchy = loaded
+    stats = loaded.stats
+    metrics.log('hierarchy_loaded',
+                f"Loaded {stats['rows']} hierarchy rows in {stats['seconds'] * 1000:.1f} ms "
+                f"({stats['rows_per_sec']:,.0f} rows/sec)",
+                rows=stats['rows'], ms=round(stats['seconds'] * 1000, 1))
+    if stats['unresolved']:
+        metrics.log('hierarchy_unresolved',
+                    f"Warning: {stats['unresolved']} departments reference a missing college",
+                    unresolved=stats['unresolved'])
 
+def reload_hierarchy(force=False):
+    """
+    Reload hierarchy.csv if it changed since it was loaded.
+
+    The new index is built on the side while requests keep using the
+    current one, then swapped in if any row differs. Every row feeds the
+    lookup indexes, including repeated node ids, so the rows are compared in
+    full; the diff is only for the summary. Returns a summary dict, or None
+    if another reload is already running.
+    """
+    global hierarchy
+    if not hierarchy_reload_lock.acquire(blocking=False):
+        return None
+    try:
+        current = hierarchy
+        try:
+            if not force and file_etag(os.stat(HIERARCHY_CSV)) == current.etag:
+                return {'status': 'unchanged', 'version': current.version}
+            with metrics.timer('hierarchy_load'):
+                loaded = load_hierarchy_csv(HIERARCHY_CSV)
+            if current.nodes and not loaded.nodes:
+                # Truncated to be rewritten; the next check picks up the finished file
+                raise ValueError(f"{HIERARCHY_CSV} has no rows")
+        except (OSError, ValueError, KeyError) as e:
+            metrics.log('hierarchy_reload_failed',
+                        f"Hierarchy reload failed, keeping the loaded version: {e}", error=str(e))
+            return {'status': 'error', 'error': str(e), 'version': current.version}
+
+        diff = diff_hierarchies(current, loaded)
+        summary = {name: len(nodes) for name, nodes in diff.items()}
+        if loaded.nodes == current.nodes:
+            # Same rows: keep the index (and everything cached against its version)
+            current.etag = loaded.etag
+            current.last_modified = loaded.last_modified
+            return dict(summary, status='unchanged', version=current.version)
+
+        hierarchy = loaded
+        metrics.log('hierarchy_reloaded',
+                    f"Reloaded {HIERARCHY_CSV}: {summary['added']} added, {summary['removed']} removed, "
+                    f"{summary['renamed']} renamed, {summary['duplicates']} repeated node keys", **summary)
+        return dict(summary, status='reloaded', version=loaded.version)
+    finally:
+        hierarchy_reload_lock.release()
+
+def hierarchy_typeahead(index):
+    # The search index is built on first use rather than on every (re)load; it
+    # costs more than parsing the file and only the typeahead endpoint needs it
+    if index.typeahead is None:
+        with typeahead_lock:
+            if index.typeahead is None:
+                with metrics.timer('typeahead_build'):
+                    index.typeahead = TypeaheadIndex(index)
+    return index.typeahead
+
+@metrics.timed('hierarchy_lookup')
 def validate_prefix(prefix, department_id):
-    if not re.match(r'^[A-Za-z]{2,3}$', prefix):
-        return False
-    department_courses = [n for n in nodes if n['parent_id'] == department_id]
-    return any(c['prefix'] == prefix.upper() for c in department_courses)
+    # Any prefix the department has courses under (real ones include A&S, B&E, CONS and MD1);
+    # the form's typeahead checks the same thing as you type
+    return bool(prefix) and bool(hierarchy.courses_for_prefix(department_id, prefix))
 
 def validate_course_number(course):
     return re.match(r'^\d{3}$', course) is not None
 
+@metrics.timed('hierarchy_lookup')
 def find_course_node(prefix, number, department_id):
-    full_code = f"{prefix} {number}"
-    return next((n for n in nodes 
-               if n['level'] == 4 
-               and n['course_no'] == full_code
-               and n['parent_id'] == department_id), None)
+    return hierarchy.find_course(f"{prefix} {number}", department_id)
 
+@metrics.timed('hierarchy_lookup')
 def find_node(caption, level, parent_caption=None):
-    for node in nodes:
-        if node['caption'] == caption and node['level'] == level:
-            if parent_caption:
-                parent = next((n for n in nodes if n['node_id'] == node['parent_id']), None)
-                if parent and parent['caption'] == parent_caption:
-                    return node
-            else:
-                return node
+    return hierarchy.find(caption, level, parent_caption)
+
+CONTACT_TYPES = ('College', 'Department', 'Course Coordinator')
+IMPORT_MAX_ROWS = 10000
+
+@metrics.timed('validation')
+def contact_error(contact):
+    """
+    Why ``contact`` cannot be saved against the loaded hierarchy, or None if it can.
+
+    Departments are resolved the way the export resolves them, and course
+    coordinators (or department contacts limited to a prefix) must name a
+    prefix, and optionally a course, that exists in their department.
+    """
+    for field in ('linkblue', 'first_name', 'last_name', 'college'):
+        if not contact[field].strip():
+            return f"{field} is required"
+    if contact['contact_type'] not in CONTACT_TYPES:
+        return f"contact_type must be one of {', '.join(CONTACT_TYPES)}"
+    if not find_node(contact['college'], 2):
+        return f"College {contact['college']} not found"
+    if contact['contact_type'] == 'College':
+        return None
+
+    department = contact['department']
+    if not department or department == 'All':
+        return "Department is required for department contacts"
+    prefix = contact['prefix'].strip().upper()
+    if contact['contact_type'] == 'Department' and prefix in ('ALL', ''):
+        if not find_node(department.replace("Fine Arts - ", ""), 3, contact['college']):
+            return f"Department {department} not found in {contact['college']}"
+        return None
+
+    dept_node = find_node(department, 3, contact['college'])
+    if not dept_node:
+        return f"Department {department} not found in {contact['college']}"
+    if not validate_prefix(prefix, dept_node['node_id']):
+        return f"Invalid prefix {prefix} for department {department}"
+    course = contact['course'].strip()
+    if course:  # Only validate course if provided
+        if not validate_course_number(course):
+            return "Course number must be 3 digits"
+        if not find_course_node(prefix, course, dept_node['node_id']):
+            return f"Course {prefix} {course} not found in department"
     return None
 
+def contact_from_import(row):
+    """Normalize one imported row (contacts.csv columns, id ignored) into a new contact."""
+    contact = {field: str(row.get(field) or '').strip() for field in CONTACTS_FIELDS[1:]}
+    contact['id'] = None
+    contact['primary_contact'] = contact['primary_contact'].lower() in ('yes', 'true', '1')
+    if contact['contact_type'] == 'College':
+        contact['department'] = contact['department'] or 'All'
+        contact['prefix'] = contact['prefix'] or 'All'
+    elif contact['contact_type'] == 'Department':
+        contact['prefix'] = contact['prefix'] or 'All'
+    return contact
+
+def assignment_key(contact):
+    # Two contacts with the same key would produce the same export rows
+    return (contact['linkblue'].lower(), contact['contact_type'], contact['college'],
+            contact['department'], contact['prefix'].upper(), contact['course'])
+
+def primary_conflict_error(contact):
+    return f"Only one primary contact allowed per {primary_scope(contact)[0]}"
+
 def load_contacts():
+    global contacts, store
+    if store is None:
+        store = open_store(CONTACTS_BACKEND, CONTACTS_CSV, CONTACTS_DB)
+    with contacts_lock, store.lock():
+        with metrics.timer('contacts_load'):
+            contacts = ContactRegistry(store.load_all(), next_id=store.next_id())
+        contacts_changed()
+
+def sync_contacts():
+    # Pick up changes another worker process made; call with contacts_lock and store.lock() held
     global contacts
-    try:
-        with open(CONTACTS_CSV, 'r') as f:
-            reader = csv.DictReader(f)
-            contacts = [{
-                'id': int(row['id']),
-                'linkblue': row['linkblue'],
-                'first_name': row['first_name'],
-                'last_name': row['last_name'],
-                'primary_contact': row['primary_contact'].lower() == 'yes',
-                'contact_type': row['contact_type'],
-                'college': row['college'],
-                'department': row['department'],
-                'course': row['course'],
-                'prefix': row['prefix'],
-                'level_type': row['level_type']
-            } for row in reader]
-    except FileNotFoundError:
-        contacts = []
-
-def save_contacts():
-    with open(CONTACTS_CSV, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=CONTACTS_FIELDS)
-        writer.writeheader()
-        for contact in contacts:
-            # Create a copy to preserve original data types
-            row = contact.copy()
-            row['primary_contact'] = str(row['primary_contact']).lower()
-            writer.writerow(row)
+    if store.stale():
+        with metrics.timer('contacts_load'):
+            contacts = ContactRegistry(store.load_all(), next_id=store.next_id())
+        contacts_changed()
+
+@contextmanager
+def editing_contacts():
+    """
+    Writer section for the contacts (read-copy-update).
+
+    Holds the writer locks, brings the registry up to date with the store and
+    yields a private copy of it. Change the copy and write the same change to
+    the store inside the block; when the block ends the copy replaces the
+    published registry. Readers keep using the registry they started with and
+    never wait; if the block raises, nothing is published.
+    """
+    global contacts
+    with contacts_lock, store.lock():
+        sync_contacts()
+        draft = contacts.copy()
+        yield draft
+        if draft.version != contacts.version:
+            contacts = draft  # Publish before bumping the version, see export_contacts
+            contacts_changed()
+
+def contacts_changed():
+    global contacts_version
+    contacts_version += 1
 
 load_hierarchy()
+
+@app.before_request
+def check_hierarchy_file():
+    # Cheap stat every few seconds; the reload itself runs in the background
+    global hierarchy_checked
+    now = time.monotonic()
+    if not HIERARCHY_CHECK_SECONDS or now - hierarchy_checked < HIERARCHY_CHECK_SECONDS:
+        return
+    hierarchy_checked = now
+    try:
+        changed = file_etag(os.stat(HIERARCHY_CSV)) != hierarchy.etag
+    except OSError:
+        return
+    if changed and not hierarchy_reload_lock.locked():
+        threading.Thread(target=reload_hierarchy, daemon=True).start()
 load_contacts()
 
+@app.before_request
+def check_contacts_store():
+    # Another worker may have written; refresh unless this process is mid-write (readers never wait)
+    if store.stale() and contacts_lock.acquire(blocking=False):
+        try:
+            with store.lock():
+                sync_contacts()
+        finally:
+            contacts_lock.release()
+
 @app.route('/')
 def index():
-    unique_colleges = list({n['caption'] for n in nodes if n['level'] == 2})
-    return render_template('index.html', contacts=contacts, colleges=unique_colleges)
+    unique_colleges = list({n['caption'] for n in hierarchy.at_level(2)})
+    return render_template('index.html', colleges=unique_colleges)
+
+@app.route('/api/contacts')
+def api_contacts():
+    filters = {}
+    if request.args.get('type'):
+        filters['contact_type'] = request.args['type']
+    if request.args.get('college'):
+        filters['college'] = request.args['college']
+    if request.args.get('primary') in ('Yes', 'No'):
+        filters['primary_contact'] = request.args['primary'] == 'Yes'
+
+    sort = request.args.get('sort', 'name')
+    if sort not in SORT_KEYS:
+        sort = 'name'
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+
+    total, page_contacts = contacts.query(
+        search=request.args.get('q', ''),
+        filters=filters,
+        sort=sort,
+        descending=request.args.get('order') == 'desc',
+        offset=(page - 1) * per_page,
+        limit=per_page
+    )
+    return jsonify({
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'pages': (total + per_page - 1) // per_page,
+        'contacts': [{
+            'id': c['id'],
+            'name': f"{c['first_name']} {c['last_name']}",
+            'linkblue': c['linkblue'],
+            'contact_type': c['contact_type'],
+            'college': c['college'],
+            'primary_contact': c['primary_contact'],
+            'department': 'All' if c['contact_type'] == 'College' else c['department']
+        } for c in page_contacts]
+    })
+
+def read_import_rows():
+    # JSON list (or {"contacts": [...]}), an uploaded CSV file, or a CSV request body
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        rows = payload.get('contacts') if isinstance(payload, dict) else payload
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ValueError("Expected a JSON list of contact objects")
+        return rows
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8-sig') if upload else request.get_data(as_text=True)
+    return list(csv.DictReader(io.StringIO(text)))
+
+def validate_import(rows, registry):
+    # Adds each valid row to ``registry`` as it goes, so later rows are checked against earlier ones
+    existing = {assignment_key(c) for c in registry}
+    added = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        contact = contact_from_import(row)
+        error = contact_error(contact)
+        if not error and assignment_key(contact) in existing:
+            error = "Contact already exists"
+        if not error and registry.primary_conflict(contact) is not None:
+            error = primary_conflict_error(contact)
+        if error:
+            errors.append({'row': number, 'linkblue': contact['linkblue'], 'error': error})
+            continue
+        existing.add(assignment_key(contact))
+        added.append(registry.add(contact))
+    return added, errors
+
+@app.route('/api/contacts/import', methods=['POST'])
+def import_contacts():
+    """
+    Add many contacts at once from CSV (contacts.csv columns) or JSON.
+
+    Every row is validated with the same rules as /add, including the
+    primary-contact rules against existing contacts and earlier rows of the
+    same import. Rows that pass are saved together in one store write; the
+    response lists the new ids and the error for each rejected row (rows are
+    numbered from 1). ?dry_run=1 validates without saving.
+    """
+    try:
+        rows = read_import_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+    if len(rows) > IMPORT_MAX_ROWS:
+        return jsonify({'error': f"At most {IMPORT_MAX_ROWS} rows per import"}), 413
+    if request.args.get('dry_run') == '1':
+        # Validate against a throwaway copy; nothing is published or written
+        added, errors = validate_import(rows, contacts.copy())
+        return jsonify({'imported': 0, 'valid': len(added), 'ids': [], 'errors': errors})
+
+    with editing_contacts() as draft:
+        added, errors = validate_import(rows, draft)
+        if added:
+            with metrics.timer('persistence'):
+                store.insert_many(added)
+    return jsonify({
+        'imported': len(added),
+        'valid': len(added),
+        'ids': [c['id'] for c in added],
+        'errors': errors
+    })
+
+@app.route('/import')
+def import_page():
+    return render_template('import_contacts.html')
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_contact():
-    colleges = [n for n in nodes if n['level'] == 2]
+    colleges = hierarchy.at_level(2)
     
     if request.method == 'POST':
         contact_type = request.form['contact_type']
@@ -123,80 +384,66 @@ def add_contact():
         department = request.form.get('department', '')
         is_primary = request.form.get('primary_contact') == 'yes'
         error = None
-        print(json.dumps(college_depts, indent=2))
 
         # Validation
         if contact_type == 'Department' and not department:
             error = "Department is required for department contacts"
         elif contact_type == 'College' and department:
             error = "College contacts cannot have a department selected"
-        elif contact_type == 'College' and is_primary:
-            existing = next((c for c in contacts 
-                           if c['college'] == college 
-                           and c['primary_contact'] 
-                           and c['contact_type'] == 'College'), None)
-            if existing:
-                error = "Only one primary contact allowed per college"
         
         if error:
             return render_template('add_contact.html',
                                   colleges=colleges,
-                                  college_depts=json.dumps(college_depts),
                                   error=error)
 
+        coordinator = contact_type == 'Department' and request.form.get('course_coordinator')
         new_contact = {
-            'id': len(contacts) + 1,
+            'id': None,  # Assigned by the registry once validation passes
             'linkblue': request.form['linkblue'],
             'first_name': request.form['first_name'],
             'last_name': request.form['last_name'],
-            'primary_contact': 'Yes' if is_primary else 'No',
-            'contact_type': 'Course Coordinator' if request.form.get('course_coordinator') else 'Department',
+            'primary_contact': is_primary,
+            'contact_type': ('College' if contact_type == 'College'
+                             else 'Course Coordinator' if coordinator else 'Department'),
+            # College and whole-department contacts are stored as "All", like the existing rows
             'college': college,
-            'department': department,
-            'course': request.form.get('course', ''),
-            'prefix': request.form.get('prefix', ''),
+            'department': department if contact_type == 'Department' else 'All',
+            'course': request.form.get('course', '') if coordinator else '',
+            'prefix': request.form.get('prefix', '') if coordinator else 'All',
             'level_type': request.form['level_type']
         }
 
-        # Additional validation for course coordinators
-        if contact_type == 'Department' and request.form.get('course_coordinator'):
-            prefix = request.form['prefix'].strip().upper()
-            course = request.form['course'].strip()
-            dept_node = find_node(department, 3, college)
-            
-            if not validate_prefix(prefix, dept_node['node_id']):
-                error = f"Invalid prefix {prefix} for department {department}"
-            elif course:  # Only validate course if provided
-                if not validate_course_number(course):
-                    error = "Course number must be 3 digits"
-                elif not find_course_node(prefix, course, dept_node['node_id']):
-                    error = f"Course {prefix} {course} not found in department"
-        
-            if error:
+        error = contact_error(new_contact)
+        if error:
+            return render_template('add_contact.html',
+                                  colleges=colleges,
+                                  error=error)
+
+        with editing_contacts() as draft:
+            # Checked against the latest contacts, under the writer lock, so two
+            # concurrent submits cannot both become primary
+            if draft.primary_conflict(new_contact) is not None:
                 return render_template('add_contact.html',
                                       colleges=colleges,
-                                      college_depts=json.dumps(college_depts),
-                                      error=error)
-
-        contacts.append(new_contact)
-        save_contacts()
+                                      error=primary_conflict_error(new_contact))
+            draft.add(new_contact)
+            with metrics.timer('persistence'):
+                store.insert(new_contact)
         return redirect(url_for('index'))
-    print(json.dumps(college_depts, indent=2))
 
-    return render_template('add_contact.html',
-                          colleges=colleges,
-                          college_depts=json.dumps(college_depts),
-                          hierarchy_tree=json.dumps(hierarchy_tree))
+    return render_template('add_contact.html', colleges=colleges)
 
 
 @app.route('/edit/<int:contact_id>', methods=['GET', 'POST'])
 def edit_contact(contact_id):
-    contact = next((c for c in contacts if c['id'] == contact_id), None)
+    contact = contacts.get(contact_id)
     if not contact:
         return redirect(url_for('index'))
 
     if request.method == 'POST':
-        contact.update({
+        # Validate a copy so a rejected edit leaves the stored contact untouched
+        updated = dict(contact)
+        updated.update({
             'linkblue': request.form['linkblue'],
             'first_name': request.form['first_name'],
             'last_name': request.form['last_name'],
@@ -209,126 +456,165 @@ def edit_contact(contact_id):
         })
 
         # Determine contact type
-        if contact['department'] == 'All':
-            contact['contact_type'] = 'College'
-        elif not contact['course']:
-            contact['contact_type'] = 'Department'
+        if updated['department'] == 'All':
+            updated['contact_type'] = 'College'
+        elif not updated['course']:
+            updated['contact_type'] = 'Department'
         else:
-            contact['contact_type'] = 'Course Coordinator'
-
-        # Validate primary contact
-        if contact['primary_contact'] and contact['contact_type'] == 'College':
-            existing = next((c for c in contacts if c['id'] != contact_id 
-                            and c['college'] == contact['college'] 
-                            and c['primary_contact'] 
-                            and c['contact_type'] == 'College'), None)
-            if existing:
-                error = "Only one primary contact allowed per college"
-                colleges = [n for n in nodes if n['level'] == 2]
-                return render_template('edit_contact.html', contact=contact, colleges=colleges, error=error)
-        save_contacts()  
+            updated['contact_type'] = 'Course Coordinator'
+
+        with editing_contacts() as draft:
+            if contact_id not in draft:  # Deleted by someone else meanwhile
+                return redirect(url_for('index'))
+            # Validate primary contact
+            if draft.primary_conflict(updated) is not None:
+                error = primary_conflict_error(updated)
+                colleges = hierarchy.at_level(2)
+                return render_template('edit_contact.html', contact=updated, colleges=colleges, error=error)
+            saved = draft.update(contact_id, updated)
+            with metrics.timer('persistence'):
+                store.update(saved)
         return redirect(url_for('index'))
 
-    colleges = [n for n in nodes if n['level'] == 2]
+    colleges = hierarchy.at_level(2)
     return render_template('edit_contact.html', contact=contact, colleges=colleges)
 
 @app.route('/delete/<int:contact_id>')
 def delete_contact(contact_id):
-    global contacts
-    # Remove the contact
-    contacts = [c for c in contacts if c['id'] != contact_id]
-    
-    # Reassign sequential IDs
-    for index, contact in enumerate(contacts, start=1):
-        contact['id'] = index
-    
-    save_contacts()
+    with editing_contacts() as draft:
+        if draft.remove(contact_id):
+            with metrics.timer('persistence'):
+                store.delete(contact_id)
     return redirect(url_for('index'))
 
+def hierarchy_response(payload, index):
+    # Hierarchy data only changes when hierarchy.csv does, so let browsers revalidate cheaply.
+    # Tag with the index the payload was built from, in case a reload swapped it meanwhile
+    response = jsonify(payload)
+    response.set_etag(index.etag)
+    response.last_modified = index.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+def node_json(node):
+    return {'node_id': node['node_id'], 'caption': node['caption']}
+
+@app.route('/api/hierarchy/colleges')
+def api_colleges():
+    index = hierarchy
+    return hierarchy_response([node_json(n) for n in index.at_level(2)], index)
+
+@app.route('/api/hierarchy/colleges/<college_id>/departments')
+def api_college_departments(college_id):
+    index = hierarchy
+    return hierarchy_response([node_json(n) for n in index.children(college_id, 3)], index)
+
+@app.route('/api/hierarchy/departments/<dept_id>/prefixes')
+def api_department_prefixes(dept_id):
+    index = hierarchy
+    prefixes = sorted({n['prefix'] for n in index.children(dept_id, 4) if n['prefix']})
+    return hierarchy_response([
+        {'prefix': prefix, 'courses': len(index.courses_for_prefix(dept_id, prefix))}
+        for prefix in prefixes
+    ], index)
+
+@app.route('/api/hierarchy/departments/<dept_id>/prefixes/<prefix>/courses')
+def api_prefix_courses(dept_id, prefix):
+    index = hierarchy
+    return hierarchy_response([
+        {'node_id': n['node_id'], 'caption': n['caption'], 'course_no': n['course_no']}
+        for n in index.courses_for_prefix(dept_id, prefix)
+    ], index)
+
+@app.route('/api/typeahead')
+def api_typeahead():
+    kind = request.args.get('kind', 'course')
+    if kind not in KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(KINDS)}"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    results = hierarchy_typeahead(hierarchy).search(request.args.get('q', ''), kind,
+                                                    scope=request.args.get('scope') or None, limit=limit)
+    return jsonify(results)
+
 @app.route('/export')
 def export_contacts():
-    output = []
-    for contact in contacts:
-        # Reset variables for each contact
-        node = None
-        target_type = None
-
-        # Handle 'All' mappings
-        is_college_all = (contact['contact_type'] == 'College' 
-                         and contact['prefix'].upper() == 'ALL')
-        is_dept_all = (contact['contact_type'] == 'Department' 
-                      and contact['prefix'].upper() == 'ALL')
-
-        if is_college_all:
-            node = find_node(contact['college'], 2)
-            target_type = 'C4'
-        
-        elif is_dept_all:
-            dept_name = contact['department'].replace("Fine Arts - ", "")
-            node = find_node(dept_name, 3, contact['college'])
-            target_type = 'D3'
-        
-        else:
-            # Course Coordinator logic
-            dept_node = find_node(contact['department'], 3, contact['college'])
-            if not dept_node:
-                # get the department name from the current contact
-                department = contact['department']
-                print(f"Skipped {contact['linkblue']}: Department {department} not found")
-                continue
-
-            if contact['course']:
-                prefix = contact['prefix'].strip().upper()
-                course_num = contact['course'].strip()
-                course_pattern = re.compile(
-                    rf'^{re.escape(prefix)}\s+?{re.escape(course_num)}$', 
-                    re.IGNORECASE
-                )
-                course_node = next(
-                    (n for n in nodes 
-                     if n['level'] == 4 
-                     and course_pattern.match(n['course_no'].strip())
-                     and n['parent_id'] == dept_node['node_id']),
-                    None
-                )
-                if course_node:
-                    output.append({
-                        'source': course_node['node_id'],
-                        'target': contact['linkblue'],
-                        'targetType': 'CRS1'
-                    })
-            else:
-                target_prefix = contact['prefix'].strip().upper()
-                for course_node in nodes:
-                    if (course_node['level'] == 4 
-                        and course_node['parent_id'] == dept_node['node_id']):
-                        node_prefix = course_node['course_no'].split()[0].upper()
-                        if node_prefix == target_prefix:
-                            output.append({
-                                'source': course_node['node_id'],
-                                'target': contact['linkblue'],
-                                'targetType': 'CRS1'
-                            })
-            continue  # Skip remaining processing for course coordinators
-
-        # Only process college/department mappings here
-        if node and target_type:
-            output.append({
-                'source': node['node_id'],
-                'target': contact['linkblue'],
-                'targetType': target_type
-            })
-
-    csv_data = "source,target,targetType\n"
-    csv_data += "\n".join([f"{row['source']},{row['target']},{row['targetType']}" for row in output])
+    # Snapshot the list so a delete during the download cannot shift rows. The
+    # version is read first: a write landing in between can only make the cached
+    # rows newer than their key, never older
+    version = contacts_version
+    snapshot = list(contacts)
+    index = hierarchy
+    rows = export_cache.stream((version, index.version),
+                               lambda: iter_assignments(snapshot, index))
     date = datetime.datetime.now().strftime("%Y%m%d")
     filename = f"ReportViewers_export_{date}.csv"
     return Response(
-        csv_data,
+        metrics.timed_iter('csv_generation', iter_csv(record_export(rows))),
         mimetype="text/csv",
         headers={"Content-disposition": f"attachment; filename={filename}"}
     )
 
+def record_export(rows):
+    # Pass rows through, writing each to the next snapshot as it goes; the snapshot
+    # becomes the base for the next delta only once the whole export has been sent
+    with snapshot_writer(EXPORT_SNAPSHOT) as write_row:
+        for row in rows:
+            write_row(row)
+            yield row
+
+@app.route('/export/delta')
+def export_delta():
+    # Only the rows to add and remove since the last export; ?advance=0 previews
+    # the delta without making this export the new base
+    version = contacts_version  # Before the snapshot, as in export_contacts
+    snapshot = list(contacts)
+    index = hierarchy
+    with metrics.timer('csv_generation'):
+        rows = export_cache.get((version, index.version),
+                                lambda: build_assignments(snapshot, index))
+        previous, base = read_snapshot(EXPORT_SNAPSHOT)
+        adds, removes = assignment_delta(previous or [], rows)
+    now = datetime.datetime.now()
+    manifest = {
+        'generated': now.isoformat(timespec='seconds'),
+        'base': base,  # None when there was no earlier export: every row is an add
+        'current': {'rows': len(set(rows)), 'sha256': assignments_digest(rows)},
+        'adds': len(adds),
+        'removes': len(removes),
+        'files': {'adds': 'adds.csv', 'removes': 'removes.csv'}
+    }
+    with metrics.timer('csv_generation'):
+        data = delta_zip(adds, removes, manifest)
+    if request.args.get('advance', '1') != '0':
+        with metrics.timer('persistence'):
+            write_snapshot(rows, EXPORT_SNAPSHOT)
+    filename = f"ReportViewers_delta_{now.strftime('%Y%m%d')}.zip"
+    return Response(
+        data,
+        mimetype="application/zip",
+        headers={"Content-disposition": f"attachment; filename={filename}"}
+    )
+
+@app.route('/admin/reload-hierarchy', methods=['POST'])
+def admin_reload_hierarchy():
+    # Reload now instead of waiting for the periodic check; ?force=1 reloads even if unchanged
+    summary = reload_hierarchy(force=request.args.get('force') == '1')
+    if summary is None:
+        return jsonify({'status': 'busy'}), 409
+    return jsonify(summary), 500 if summary['status'] == 'error' else 200
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text format; each worker process keeps and reports its own numbers
+    metrics.set_gauge('contactweb_contacts', len(contacts), "Contacts loaded in this process.")
+    metrics.set_gauge('contactweb_hierarchy_nodes', hierarchy.stats.get('rows', 0), "Nodes in the loaded hierarchy.")
+    metrics.set_gauge('contactweb_hierarchy_version', hierarchy.version, "Version of the loaded hierarchy index.")
+    metrics.set_gauge('contactweb_export_cache_hits_total', export_cache.hits,
+                      "Exports served from the cached rows.", kind='counter')
+    metrics.set_gauge('contactweb_export_cache_misses_total', export_cache.misses,
+                      "Exports that had to rebuild their rows.", kind='counter')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
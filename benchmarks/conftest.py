@@ -0,0 +1,134 @@
+import importlib
+import os
+import shutil
+import statistics
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate import generate  # noqa: E402
+from storage import import_csv, open_store  # noqa: E402
+
+# Data sizes to run at, as multiples of the real data: BENCH_SCALES=10,100
+SCALES = [int(s) for s in os.environ.get('BENCH_SCALES', '10').split(',')]
+
+
+@pytest.fixture(scope='session', params=SCALES, ids=lambda scale: f"{scale}x")
+def dataset(request, tmp_path_factory):
+    """Synthetic hierarchy.csv and contacts.csv at one of SCALES."""
+    directory = tmp_path_factory.mktemp(f"data{request.param}x")
+    departments = generate(str(directory), scale=request.param)
+    return {'scale': request.param, 'directory': str(directory), 'departments': departments}
+
+
+@pytest.fixture(scope='session')
+def app_module(dataset):
+    """
+    The app module, configured to load the synthetic data.
+
+    The data paths are set in the environment before the first import (the
+    app loads its data at import time) and on the module for later scales.
+    Both are put back when the fixture is torn down.
+    """
+    paths = {
+        'HIERARCHY_CSV': os.path.join(dataset['directory'], 'hierarchy.csv'),
+        'CONTACTS_CSV': os.path.join(dataset['directory'], 'contacts.csv'),
+        'EXPORT_SNAPSHOT': os.path.join(dataset['directory'], 'export_snapshot.csv'),
+    }
+    settings = dict(paths, CONTACTS_BACKEND='csv')
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in settings.items():
+            patch.setenv(name, value)
+        patch.setenv('HIERARCHY_CHECK_SECONDS', '0')
+        first_import = 'app' not in sys.modules
+        app = importlib.import_module('app')
+        if not first_import:
+            for name, value in settings.items():
+                patch.setattr(app, name, value)
+            patch.setattr(app, 'HIERARCHY_CHECK_SECONDS', 0.0)
+            patch.setattr(app, 'store', None)
+            app.load_hierarchy()
+            app.load_contacts()
+        patch.setattr(app.app, 'testing', True)
+        yield app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='session', params=['csv', 'sqlite'])
+def contact_store(request, dataset, tmp_path_factory):
+    """A contact store of each backend over its own copy of the synthetic contacts."""
+    directory = str(tmp_path_factory.mktemp(f"store-{request.param}-{dataset['scale']}x"))
+    csv_path = os.path.join(directory, 'contacts.csv')
+    db_path = os.path.join(directory, 'contacts.db')
+    shutil.copy(os.path.join(dataset['directory'], 'contacts.csv'), csv_path)
+    if request.param == 'sqlite':
+        import_csv(csv_path, db_path)
+    store = open_store(request.param, csv_path, db_path)
+    store.load_all()
+    return store
+
+
+class SimpleBenchmark:
+    """
+    Stand-in for pytest-benchmark's ``benchmark`` fixture when it is not installed.
+
+    Calls the function repeatedly for about BENCH_SECONDS (at least 3 rounds)
+    and prints min/median/mean timings; ``extra_info`` is printed with them.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.extra_info = {}
+        self.stats = None
+
+    def __call__(self, function, *args, **kwargs):
+        budget = float(os.environ.get('BENCH_SECONDS', '1'))
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < 3 or (time.perf_counter() - started < budget and len(timings) < 1000):
+            t0 = time.perf_counter()
+            result = function(*args, **kwargs)
+            timings.append(time.perf_counter() - t0)
+        self.stats = {'rounds': len(timings), 'min': min(timings),
+                      'median': statistics.median(timings), 'mean': statistics.mean(timings)}
+        return result
+
+    def pedantic(self, function, args=(), kwargs=None, setup=None, rounds=1, iterations=1, **_):
+        timings = []
+        result = None
+        for _ in range(rounds):
+            # Like pytest-benchmark, setup may return the (args, kwargs) for this round
+            prepared = setup() if setup else None
+            round_args, round_kwargs = prepared if prepared else (args, kwargs or {})
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                result = function(*round_args, **round_kwargs)
+            timings.append((time.perf_counter() - t0) / iterations)
+        self.stats = {'rounds': rounds, 'min': min(timings),
+                      'median': statistics.median(timings), 'mean': statistics.mean(timings)}
+        return result
+
+    def report(self):
+        if self.stats:
+            extra = ''.join(f" {k}={v}" for k, v in self.extra_info.items())
+            print(f"\n{self.name}: {self.stats['rounds']} rounds, min {self.stats['min'] * 1000:.3f} ms, "
+                  f"median {self.stats['median'] * 1000:.3f} ms, mean {self.stats['mean'] * 1000:.3f} ms{extra}")
+
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    @pytest.fixture
+    def benchmark(request):
+        bench = SimpleBenchmark(request.node.name)
+        yield bench
+        bench.report()
@@ -0,0 +1,107 @@
+import argparse
+import csv
+import os
+import random
+import string
+
+# Shape of the real hierarchy.csv at scale 1: 23 colleges, about 7 departments
+# per college and 38 courses per department (~6,300 rows); 132 contacts
+COLLEGES = 23
+DEPARTMENTS_PER_COLLEGE = 7
+COURSES_PER_DEPARTMENT = 38
+CONTACTS = 132
+
+HIERARCHY_HEADER = ['Node Id', 'Node Caption', 'Parent Node Id', 'Parent Node Caption', 'Level', 'CourseNo']
+CONTACTS_HEADER = ['id', 'linkblue', 'first_name', 'last_name', 'primary_contact',
+                   'contact_type', 'college', 'department', 'course', 'prefix', 'level_type']
+
+
+def department_prefix(number):
+    """A distinct three-letter prefix for the ``number``-th department (AAA, AAB, ...)."""
+    letters = []
+    for _ in range(3):
+        number, digit = divmod(number, 26)
+        letters.append(string.ascii_uppercase[digit])
+    return ''.join(reversed(letters))
+
+
+def generate_hierarchy(path, scale=1):
+    """
+    Write a synthetic hierarchy.csv ``scale`` times the size of the real one.
+
+    Every department gets its own prefix and courses numbered from 100, so
+    each course can be found by prefix and number like a real one.
+
+    Returns:
+        list: (college caption, department caption, prefix, course numbers) per department
+    """
+    departments = []
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HIERARCHY_HEADER)
+        writer.writerow(['University', 'University', '', '', 1, ''])
+        for c in range(COLLEGES * scale):
+            college_id = f"C{c:05d}"
+            college = f"College {c:05d}"
+            writer.writerow([college_id, college, 'University', 'University', 2, ''])
+            for d in range(DEPARTMENTS_PER_COLLEGE):
+                number = c * DEPARTMENTS_PER_COLLEGE + d
+                dept_id = f"D{number:07d}"
+                dept = f"Department {number:07d}"
+                prefix = department_prefix(number)
+                writer.writerow([dept_id, dept, college_id, college, 3, ''])
+                courses = [str(100 + i * 7) for i in range(COURSES_PER_DEPARTMENT)]
+                for i, course in enumerate(courses):
+                    writer.writerow([f"K{number:07d}{i:03d}", f"{prefix} COURSE {course}",
+                                     dept_id, dept, 4, f"{prefix} {course}"])
+                departments.append((college, dept, prefix, courses))
+    return departments
+
+
+def generate_contacts(path, departments, scale=1, seed=0):
+    """
+    Write a synthetic contacts.csv ``scale`` times the size of the real one.
+
+    The mix follows the real file: about a quarter college contacts, most of
+    the rest whole-department contacts and a few course coordinators, with
+    at most one primary contact per college.
+    """
+    rng = random.Random(seed)
+    primaries = set()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CONTACTS_HEADER)
+        for contact_id in range(1, CONTACTS * scale + 1):
+            college, dept, prefix, courses = rng.choice(departments)
+            kind = rng.random()
+            primary = False
+            if kind < 0.27:
+                primary = college not in primaries and rng.random() < 0.4
+                if primary:
+                    primaries.add(college)
+                row = ['College', college, 'All', '', 'All']
+            elif kind < 0.95:
+                row = ['Department', college, dept, '', 'All']
+            else:
+                row = ['Course Coordinator', college, dept, rng.choice(courses + ['']), prefix]
+            writer.writerow([contact_id, f"u{contact_id:06d}", 'First', f"Last{contact_id}",
+                             'true' if primary else 'false'] + row +
+                            [rng.choice(['Report Viewer', 'Subject Viewer'])])
+
+
+def generate(directory, scale=1, seed=0):
+    """Write hierarchy.csv and contacts.csv into ``directory``; returns the department list."""
+    os.makedirs(directory, exist_ok=True)
+    departments = generate_hierarchy(os.path.join(directory, 'hierarchy.csv'), scale)
+    generate_contacts(os.path.join(directory, 'contacts.csv'), departments, scale, seed)
+    return departments
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic hierarchy.csv and contacts.csv.")
+    parser.add_argument('directory')
+    parser.add_argument('--scale', type=int, default=10, help="Multiple of the real data size")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generate(args.directory, args.scale, args.seed)
+    print(f"Wrote {args.scale}x hierarchy.csv and contacts.csv to {args.directory}")
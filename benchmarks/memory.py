@@ -0,0 +1,12 @@
+import tracemalloc
+
+
+def measure_peak(function, *args, **kwargs):
+    """Run ``function`` once under tracemalloc; returns (result, peak KiB allocated)."""
+    tracemalloc.start()
+    try:
+        result = function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1024
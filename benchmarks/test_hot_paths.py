@@ -0,0 +1,175 @@
+"""
+Latency and memory benchmarks for the app's hot paths on synthetic data.
+
+Each test times one path with the ``benchmark`` fixture and measures its peak
+allocation once with tracemalloc. The memory budgets scale with the data and
+are set well above today's numbers; they are there to catch a path that
+starts copying the whole dataset, not to track small changes.
+"""
+import itertools
+
+import pytest
+
+from memory import measure_peak
+
+# Peak KiB allowed per 1x of data size
+HIERARCHY_KIB_PER_SCALE = 12 * 1024  # Old and new index are both alive during a reload
+CONTACTS_KIB_PER_SCALE = 256
+EXPORT_KIB_PER_SCALE = 1024
+REQUEST_KIB = 2 * 1024
+STORE_LOAD_KIB_PER_SCALE = 1536  # load_all parses every contact into a fresh dict
+STORE_ROUNDS = 200  # Store writes per test: enough to include a journal compaction on the csv backend
+
+_linkblues = itertools.count(1)
+
+
+def check_memory(benchmark, peak_kib, budget_kib):
+    benchmark.extra_info['peak_kib'] = round(peak_kib)
+    assert peak_kib < budget_kib, f"peak {peak_kib:.0f} KiB over the {budget_kib} KiB budget"
+
+
+def add_form(college, department, prefix, course):
+    return {
+        'contact_type': 'Department',
+        'college': college,
+        'department': department,
+        'course_coordinator': 'yes',
+        'prefix': prefix,
+        'course': course,
+        'linkblue': 'bench01',
+        'first_name': 'Bench',
+        'last_name': 'Mark',
+        'level_type': 'Report Viewer',
+    }
+
+
+def test_load_hierarchy(benchmark, app_module, dataset):
+    benchmark(app_module.load_hierarchy)
+    _, peak = measure_peak(app_module.load_hierarchy)
+    check_memory(benchmark, peak, HIERARCHY_KIB_PER_SCALE * dataset['scale'])
+    assert len(app_module.hierarchy.at_level(2)) == len({d[0] for d in dataset['departments']})
+
+
+def test_load_contacts(benchmark, app_module, dataset):
+    benchmark(app_module.load_contacts)
+    _, peak = measure_peak(app_module.load_contacts)
+    check_memory(benchmark, peak, CONTACTS_KIB_PER_SCALE * dataset['scale'])
+    assert len(app_module.contacts) == 132 * dataset['scale']
+
+
+def test_find_node(benchmark, app_module, dataset):
+    departments = dataset['departments'][::max(1, len(dataset['departments']) // 500)]
+
+    def find_all():
+        for college, department, _, _ in departments:
+            assert app_module.find_node(college, 2)
+            assert app_module.find_node(department, 3, college)
+
+    benchmark(find_all)
+    _, peak = measure_peak(find_all)
+    check_memory(benchmark, peak, REQUEST_KIB)
+
+
+def test_add_validation(benchmark, app_module, client, dataset):
+    # A course that does not exist: every check runs, the last one fails and nothing is written
+    college, department, prefix, _ = dataset['departments'][-1]
+    form = add_form(college, department, prefix, '999')
+    count = len(app_module.contacts)
+
+    response = benchmark(client.post, '/add', data=form)
+    assert response.status_code == 200
+    assert f"Course {prefix} 999 not found" in response.get_data(as_text=True)
+    _, peak = measure_peak(client.post, '/add', data=form)
+    check_memory(benchmark, peak, REQUEST_KIB)
+    assert len(app_module.contacts) == count
+
+
+@pytest.mark.parametrize('query', [
+    'page=1',
+    'q=last1&sort=name',
+    'type=Department&sort=college&order=desc&page=3',
+    'college=College+00003&primary=No&q=u0&per_page=100',
+], ids=['first-page', 'search', 'filter-sort-page', 'combined'])
+def test_api_contacts(benchmark, app_module, client, dataset, query):
+    response = benchmark(client.get, f'/api/contacts?{query}')
+    assert response.status_code == 200
+    assert response.get_json()['total'] > 0
+    _, peak = measure_peak(client.get, f'/api/contacts?{query}')
+    check_memory(benchmark, peak, REQUEST_KIB + CONTACTS_KIB_PER_SCALE * dataset['scale'])
+
+
+def export(client):
+    response = client.get('/export')
+    assert response.status_code == 200
+    return response.get_data()
+
+
+def test_export_cold(benchmark, app_module, client, dataset):
+    def cold():
+        app_module.export_cache.clear()
+        return export(client)
+
+    data = benchmark(cold)
+    assert data.count(b'\n') > 1
+    _, peak = measure_peak(cold)
+    check_memory(benchmark, peak, EXPORT_KIB_PER_SCALE * dataset['scale'])
+
+
+def test_export_cached(benchmark, app_module, client, dataset):
+    export(client)
+    benchmark(export, client)
+    _, peak = measure_peak(export, client)
+    check_memory(benchmark, peak, EXPORT_KIB_PER_SCALE * dataset['scale'])
+
+
+def bench_contact(contact_id):
+    n = next(_linkblues)
+    return {'id': contact_id, 'linkblue': f"bench{n:06d}", 'first_name': 'Bench', 'last_name': f"Mark{n}",
+            'primary_contact': False, 'contact_type': 'College', 'college': 'College 00000',
+            'department': 'All', 'course': '', 'prefix': 'All', 'level_type': 'Report Viewer'}
+
+
+def locked(store, method, *args):
+    # As the app does it: every store write holds the cross-process lock
+    with store.lock():
+        return method(*args)
+
+
+def store_write(benchmark, store, method, setup):
+    benchmark.pedantic(locked, setup=lambda: ((store, method) + setup(), {}), rounds=STORE_ROUNDS)
+    _, peak = measure_peak(locked, store, method, *setup())
+    check_memory(benchmark, peak, REQUEST_KIB)
+
+
+def test_store_insert(benchmark, contact_store):
+    store_write(benchmark, contact_store, contact_store.insert,
+                lambda: (bench_contact(contact_store.next_id()),))
+
+
+def test_store_insert_many(benchmark, contact_store):
+    def batch():
+        first = contact_store.next_id()
+        return ([bench_contact(first + i) for i in range(25)],)
+
+    store_write(benchmark, contact_store, contact_store.insert_many, batch)
+
+
+def test_store_update(benchmark, contact_store):
+    ids = itertools.cycle(sorted(c['id'] for c in contact_store.load_all()))
+    store_write(benchmark, contact_store, contact_store.update, lambda: (bench_contact(next(ids)),))
+
+
+def test_store_delete(benchmark, contact_store):
+    def inserted():
+        contact = bench_contact(contact_store.next_id())
+        locked(contact_store, contact_store.insert, contact)
+        return (contact['id'],)
+
+    store_write(benchmark, contact_store, contact_store.delete, inserted)
+
+
+def test_store_load_all(benchmark, contact_store, dataset):
+    contacts = benchmark(contact_store.load_all)
+    assert len(contacts) >= 132 * dataset['scale']
+    _, peak = measure_peak(contact_store.load_all)
+    check_memory(benchmark, peak, STORE_LOAD_KIB_PER_SCALE * dataset['scale'])
@@ -1,34 +1,202 @@
-file2 = "/Users/elnoelakwa/Downloads/ReportViewers_export_20250430.csv"
-file1=  "/Users/elnoelakwa/Downloads/ReportViewers_0303.csv"
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import zlib
+from collections import defaultdict
 
-import pandas as pd
-import re
+from export import EXPORT_FIELDS
+from hierarchy import HierarchyIndex, load_hierarchy_csv
 
-# look for distinct valukes in 1 and 2nd columns in both files
-# print the values not in both files in a list
+# Rows per partition are held in memory while comparing; size partitions so
+# that is roughly this many bytes of CSV from both files together
+PARTITION_BYTES = 64 * 1024 * 1024
+CHANGE_TYPES = ('added', 'removed', 'changed')
+DETAIL_FIELDS = ['change', 'college', 'department', 'source', 'target', 'targetType', 'old_targetType']
 
-def get_distinct_values(file1, file2):
-    # Read the CSV files
-    df1 = pd.read_csv(file1)
-    df2 = pd.read_csv(file2)
 
-    # Get distinct values from the first two columns of each file
-    distinct_values_file1 = set(df1.iloc[:, 1].unique())
-    distinct_values_file2 = set(df2.iloc[:, 1].unique())
+def read_assignments(path):
+    """
+    Stream (source, target, targetType) rows from a ReportViewers export.
 
-    # Find values that are in file1 but not in file2
-    not_in_file2 = distinct_values_file1 - distinct_values_file2
+    Columns are found by name, falling back to the first three columns for
+    files whose header differs from the app's export.
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        if all(field in header for field in EXPORT_FIELDS):
+            columns = [header.index(field) for field in EXPORT_FIELDS]
+        else:
+            columns = [0, 1, 2]
+        for row in reader:
+            if len(row) > max(columns):
+                yield tuple(row[i].strip() for i in columns)
 
-    # Find values that are in file2 but not in file1
-    not_in_file1 = distinct_values_file2 - distinct_values_file1
 
-    return not_in_file2, not_in_file1
+def _partition(key, partitions):
+    return zlib.crc32(f"{key[0]}\x1f{key[1]}".encode('utf-8')) % partitions
+
+
+def partition_file(path, partitions, workdir, tag):
+    """Split an export into ``partitions`` files by a hash of (source, target)."""
+    paths = [os.path.join(workdir, f"{tag}-{i}.csv") for i in range(partitions)]
+    files = [open(p, 'w', newline='') for p in paths]
+    try:
+        writers = [csv.writer(f) for f in files]
+        for row in read_assignments(path):
+            writers[_partition(row, partitions)].writerow(row)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _load_partition(rows):
+    # (source, target) -> set of target types
+    assignments = defaultdict(set)
+    for source, target, target_type in rows:
+        assignments[(source, target)].add(target_type)
+    return assignments
+
+
+def diff_assignments(previous_rows, current_rows):
+    """
+    Compare two sets of export rows that fit in memory.
+
+    An assignment is a (source, target) pair. It is added or removed when
+    the pair appears in only one of the files, and changed when it is in
+    both with a different targetType.
+
+    Yields:
+        tuple: (change, source, target, targetType, old targetType)
+    """
+    previous = _load_partition(previous_rows)
+    current = _load_partition(current_rows)
+    for key, types in current.items():
+        old_types = previous.get(key)
+        if old_types is None:
+            for target_type in sorted(types):
+                yield ('added', key[0], key[1], target_type, '')
+        elif old_types != types:
+            yield ('changed', key[0], key[1], '|'.join(sorted(types)), '|'.join(sorted(old_types)))
+    for key, old_types in previous.items():
+        if key not in current:
+            for target_type in sorted(old_types):
+                yield ('removed', key[0], key[1], '', target_type)
+
+
+def _read_partition(path):
+    with open(path, 'r', newline='') as f:
+        yield from csv.reader(f)
+
+
+def reconcile(previous_path, current_path, partitions=None):
+    """
+    Stream the differences between two ReportViewers exports.
+
+    Both files are split into partitions by a hash of (source, target), so
+    a given assignment lands in the same partition of each file and only
+    one partition pair is held in memory at a time. Small files are
+    compared directly.
+
+    Args:
+        previous_path (str): The last uploaded export
+        current_path (str): The new export from the app's /export
+        partitions (int): Number of partitions; defaults to one per PARTITION_BYTES of input
+
+    Yields:
+        tuple: (change, source, target, targetType, old targetType), see diff_assignments
+    """
+    if partitions is None:
+        size = os.path.getsize(previous_path) + os.path.getsize(current_path)
+        partitions = max(1, -(-size // PARTITION_BYTES))
+    if partitions == 1:
+        yield from diff_assignments(read_assignments(previous_path), read_assignments(current_path))
+        return
+
+    workdir = tempfile.mkdtemp(prefix='reconcile-')
+    try:
+        previous_parts = partition_file(previous_path, partitions, workdir, 'previous')
+        current_parts = partition_file(current_path, partitions, workdir, 'current')
+        for previous_part, current_part in zip(previous_parts, current_parts):
+            yield from diff_assignments(_read_partition(previous_part), _read_partition(current_part))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def node_location(hierarchy, source):
+    """(college, department) captions for an export source node id."""
+    node = hierarchy.get(source)
+    if node is None:
+        return ('(not in hierarchy)', '')
+    if node['level'] == 4:
+        department = hierarchy.get(node['parent_id'])
+        if department is None:
+            return ('(not in hierarchy)', node['parent_id'])
+        node = department
+    if node['level'] == 3:
+        college = hierarchy.get(node['parent_id'])
+        return (college['caption'] if college else node['parent_id'], node['caption'])
+    if node['level'] == 2:
+        return (node['caption'], 'All')
+    return (node['caption'], '')
+
+
+def summarize(differences, hierarchy, details_path=None):
+    """
+    Count differences per (college, department), optionally writing each one to a CSV.
+
+    Returns:
+        dict: (college, department) -> {'added': n, 'removed': n, 'changed': n}
+    """
+    summary = defaultdict(lambda: dict.fromkeys(CHANGE_TYPES, 0))
+    details = open(details_path, 'w', newline='') if details_path else None
+    try:
+        writer = csv.writer(details) if details else None
+        if writer:
+            writer.writerow(DETAIL_FIELDS)
+        for change, source, target, target_type, old_type in differences:
+            college, department = node_location(hierarchy, source)
+            summary[(college, department)][change] += 1
+            if writer:
+                writer.writerow([change, college, department, source, target, target_type, old_type])
+    finally:
+        if details:
+            details.close()
+    return dict(summary)
+
+
+def print_summary(summary):
+    if not summary:
+        print("No differences: both exports contain the same assignments.")
+        return
+    totals = dict.fromkeys(CHANGE_TYPES, 0)
+    print(f"{'Added':>7} {'Removed':>7} {'Changed':>7}  College / Department")
+    for (college, department), counts in sorted(summary.items()):
+        for change in CHANGE_TYPES:
+            totals[change] += counts[change]
+        print(f"{counts['added']:>7} {counts['removed']:>7} {counts['changed']:>7}  "
+              f"{college}{' / ' + department if department else ''}")
+    print(f"{totals['added']:>7} {totals['removed']:>7} {totals['changed']:>7}  Total")
 
-not_in_file2, not_in_file1 = get_distinct_values(file1, file2)
 
 # main
 if __name__ == "__main__":
-    print("Values in file1 but not in file2:")
-    for value in not_in_file2:
-        print(value)
+    parser = argparse.ArgumentParser(
+        description="Reconcile a new ReportViewers export against the previous upload.")
+    parser.add_argument('previous', help="Previously uploaded export CSV")
+    parser.add_argument('current', help="New export CSV from the app")
+    parser.add_argument('--hierarchy', default='hierarchy.csv',
+                        help="Hierarchy used to group differences by college and department")
+    parser.add_argument('--partitions', type=int,
+                        help="Hash partitions for bounded memory (default: by file size)")
+    parser.add_argument('--details', help="Write every added/removed/changed assignment to this CSV")
+    args = parser.parse_args()
 
+    hierarchy = load_hierarchy_csv(args.hierarchy) if os.path.exists(args.hierarchy) else HierarchyIndex()
+    summary = summarize(reconcile(args.previous, args.current, args.partitions), hierarchy, args.details)
+    print_summary(summary)
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+import metrics
+
+try:
+    import pyarrow  # noqa: F401  Parquet cache when available
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+CACHE_DIR = '.cache'
+
+# Low-cardinality text columns are stored as categoricals
+CATEGORY_COLUMNS = [
+    'PREFIX', 'ACADEMIC_TERM_ID', 'ACADEMIC_TERM', 'CLASS_DEPARTMENT', 'CLASS_DEPARTMENT_ID',
+    'CLASS_COLLEGE', 'CLASS_COLLEGE_SHORT', 'CLASS_LEVEL', 'IS_CROSSLISTED',
+    'DISTANCE_LEARNING', 'IS_UK_CORE', 'UK_CORE_TYPE', 'SPEC_TYPE'
+]
+# Identifiers keep their exact text (no int/float inference, leading zeros kept)
+STRING_COLUMNS = [
+    'SECTION_KEY', 'TITLE', 'CANVAS_SIS_ID', 'CRS_SECTION', 'CLASS', 'CLASS_ID',
+    'SECTION', 'SECTION_ID', 'SECTION_TITLE', 'CROSSLISTED_ID'
+]
+INTEGER_COLUMNS = ['ACADEMIC_YEAR', 'SECTION_LENGTH_DAYS']
+DATE_COLUMNS = [
+    'SECTION_BEGIN_DATE', 'SECTION_END_DATE', 'TCE_INVITE', 'TCE_R1', 'TCE_R2',
+    'TCE_END_DATE', 'TCE_REPORT_DATE'
+]
+COURSE_COLUMNS = CATEGORY_COLUMNS + STRING_COLUMNS + INTEGER_COLUMNS + DATE_COLUMNS
+
+
+def read_courses_csv(csv_file_path, columns=None):
+    """
+    Parse the Courses.csv extract with explicit types.
+
+    Only the requested columns are read (all known columns by default). Text
+    identifiers stay strings, low-cardinality text becomes categorical,
+    years and lengths are nullable integers and the TCE/section dates are
+    datetimes, with unparseable dates as NaT.
+
+    Args:
+        csv_file_path (str): Path to Courses.csv
+        columns (list): Columns to read; defaults to COURSE_COLUMNS present in the file
+
+    Returns:
+        DataFrame: Typed course data
+    """
+    header = pd.read_csv(csv_file_path, nrows=0).columns
+    wanted = [c for c in (columns or COURSE_COLUMNS) if c in header]
+    missing = [c for c in (columns or []) if c not in header]
+    if missing:
+        raise KeyError(f"Columns not in {csv_file_path}: {', '.join(missing)}")
+
+    dtypes = {c: 'string' for c in wanted if c in STRING_COLUMNS or c in DATE_COLUMNS}
+    dtypes.update({c: 'category' for c in wanted if c in CATEGORY_COLUMNS})
+    dtypes.update({c: 'Int32' for c in wanted if c in INTEGER_COLUMNS})
+    courses = pd.read_csv(csv_file_path, usecols=wanted, dtype=dtypes)
+    for column in wanted:
+        if column in DATE_COLUMNS:
+            courses[column] = pd.to_datetime(courses[column], errors='coerce')
+    return courses[wanted]
+
+
+def load_courses(csv_file_path='Courses.csv', columns=None, cache_dir=CACHE_DIR):
+    """
+    Load Courses.csv through a columnar cache of the parsed file.
+
+    The first call parses every known column once and writes the typed frame
+    to ``cache_dir`` (Parquet when pyarrow is installed, pickle otherwise),
+    tagged with the CSV's file identity, size and modification time. Later
+    calls -- from any script, whatever case or relative path it spells the
+    file name with -- read the cache instead of re-parsing, until the CSV changes.
+
+    Args:
+        csv_file_path (str): Path to Courses.csv
+        columns (list): Columns to return; defaults to all cached columns
+        cache_dir (str): Cache directory, or None to always parse the CSV
+
+    Returns:
+        DataFrame: Typed course data
+    """
+    if cache_dir is None or any(c not in COURSE_COLUMNS for c in columns or ()):
+        return read_courses_csv(csv_file_path, columns)
+
+    source = os.stat(csv_file_path)  # Raises FileNotFoundError like pd.read_csv
+    # The file's identity rather than its path, which can be spelled differently on case-insensitive filesystems
+    signature = {'dev': source.st_dev, 'ino': source.st_ino, 'size': source.st_size,
+                 'mtime_ns': source.st_mtime_ns, 'format': CACHE_FORMAT}
+    name = os.path.splitext(os.path.basename(csv_file_path))[0]
+    data_path = os.path.join(cache_dir, f"{name}.{CACHE_FORMAT}")
+    meta_path = os.path.join(cache_dir, f"{name}.json")
+
+    courses = None
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('signature') == signature:
+            courses = _read_cache(data_path, columns)
+    except (FileNotFoundError, ValueError, OSError):
+        courses = None
+
+    if courses is None:
+        started = time.perf_counter()
+        full = read_courses_csv(csv_file_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_cache(full, data_path)
+        with open(meta_path, 'w') as f:
+            json.dump({'source': os.path.abspath(csv_file_path), 'signature': signature}, f)
+        seconds = time.perf_counter() - started
+        metrics.log('courses_parsed',
+                    f"Parsed {csv_file_path} ({len(full)} rows) in {seconds:.2f}s; cached to {data_path}",
+                    source=csv_file_path, rows=len(full), seconds=round(seconds, 2), cache=data_path)
+        courses = full[columns] if columns else full
+    return courses
+
+
+def _read_cache(data_path, columns):
+    if CACHE_FORMAT == 'parquet':
+        return pd.read_parquet(data_path, columns=columns)
+    courses = pd.read_pickle(data_path)
+    return courses[columns] if columns else courses
+
+
+def _write_cache(courses, data_path):
+    tmp_path = data_path + '.tmp'
+    if CACHE_FORMAT == 'parquet':
+        courses.to_parquet(tmp_path, index=False)
+    else:
+        courses.to_pickle(tmp_path)
+    os.replace(tmp_path, data_path)
@@ -4,14 +4,15 @@ from dash import dcc, html
 from dash.dependencies import Input, Output
 import plotly.express as px
 import datetime
+from functools import lru_cache
+from intervals import CoverageTimeline, overlaps_per_bin
+from course_data import load_courses
 
 # Load and preprocess data (replace with your actual file paths)
 def load_data():
-    # Load courses data with explicit dtype for problem column
-    courses = pd.read_csv('courses.csv', dtype={'column_31': str})  # Replace 'column_31' with actual column name
-    courses = courses[['SECTION_KEY', 'TCE_INVITE', 'TCE_END_DATE']]
-    courses['TCE_INVITE'] = pd.to_datetime(courses['TCE_INVITE'], errors='coerce')
-    courses['TCE_END_DATE'] = pd.to_datetime(courses['TCE_END_DATE'], errors='coerce')
+    # Typed columns from the shared loader; dates are already parsed (invalid ones are NaT)
+    courses = load_courses('Courses.csv',
+                           columns=['SECTION_KEY', 'CLASS_COLLEGE', 'TCE_INVITE', 'TCE_END_DATE'])
     
     # Drop rows with invalid dates
     courses = courses.dropna(subset=['TCE_INVITE', 'TCE_END_DATE'])
@@ -26,8 +27,8 @@ def load_data():
     # Merge with courses data
     merged = pd.merge(courses, student_counts, on='SECTION_KEY', how='left')
     
-    # Filter for courses with >5 students and in 2025
-    merged = merged[merged['STUDENT_COUNT'] > 5]
+    # Filter for courses in 2025; the student-count threshold is a dashboard control
+    merged['STUDENT_COUNT'] = merged['STUDENT_COUNT'].fillna(0).astype(int)
     merged = merged[
         (merged['TCE_INVITE'].dt.year == 2025) | 
         (merged['TCE_END_DATE'].dt.year == 2025)
@@ -36,51 +37,52 @@ def load_data():
     return merged
 
 data = load_data()
+data['DURATION'] = (data['TCE_END_DATE'] - data['TCE_INVITE']).dt.days
 
-# Filter for June-August 2025
-summer_data = data[
-    ((data['TCE_INVITE'].dt.month >= 6) & (data['TCE_INVITE'].dt.month <= 8)) |
-    ((data['TCE_END_DATE'].dt.month >= 6) & (data['TCE_END_DATE'].dt.month <= 8))
-].copy()
+SUMMER_START = datetime.datetime(2025, 6, 1)
+SUMMER_END = datetime.datetime(2025, 8, 31, 23, 59, 59)
+DEFAULT_MIN_STUDENTS = 6  # Courses with more than 5 students
+MAX_SECTION_BARS = 400  # Above this many sections the timeline is binned by day
 
-# Add duration column for visualization
-summer_data['DURATION'] = (summer_data['TCE_END_DATE'] - summer_data['TCE_INVITE']).dt.days
+def filter_mask(min_students, colleges):
+    mask = data['STUDENT_COUNT'] >= min_students
+    if colleges:
+        mask &= data['CLASS_COLLEGE'].isin(colleges)
+    return mask
 
-# Create Dash app
-app = dash.Dash(__name__)
+def select_sections(range_start, range_end, min_students, colleges):
+    """Sections whose evaluation overlaps the range and pass the filters."""
+    mask = ((data['TCE_INVITE'] <= range_end) & (data['TCE_END_DATE'] >= range_start)
+            & filter_mask(min_students, colleges))
+    return data[mask]
 
-app.layout = html.Div([
-    html.H1("Course Evaluation Schedule Dashboard", style={'textAlign': 'center'}),
-    
-    html.Div([
-        html.Div([
-            html.H3("Evaluation Timeline (June-August 2025)"),
-            dcc.Graph(id='timeline-graph')
-        ], style={'width': '80%', 'display': 'inline-block'}),
-        
-        html.Div([
-            html.H3("Course Statistics"),
-            html.Div(id='course-stats')
-        ], style={'width': '18%', 'display': 'inline-block', 'verticalAlign': 'top'})
-    ]),
-    
-    html.Div([
-        html.H3("Downtime Finder"),
-        html.P("Potential downtime periods with no evaluations:"),
-        html.Ul(id='downtime-list')
-    ])
-])
+@lru_cache(maxsize=32)
+def coverage_timeline(min_students, colleges):
+    """
+    Active-evaluation step function over every section passing the filters.
 
-@app.callback(
-    [Output('timeline-graph', 'figure'),
-     Output('course-stats', 'children'),
-     Output('downtime-list', 'children')],
-    [Input('timeline-graph', 'hoverData')]
-)
-def update_dashboard(hover_data):
-    # Create timeline visualization
+    The date range only clips what is read from it, so views that differ
+    only in their range share one timeline.
+    """
+    sections = data[filter_mask(min_students, colleges)]
+    return CoverageTimeline(sections['TCE_INVITE'].to_numpy(), sections['TCE_END_DATE'].to_numpy())
+
+# Built once at startup for the default controls; other filters are built on first use
+coverage_timeline(DEFAULT_MIN_STUDENTS, ())
+
+def find_downtime(range_start, range_end, min_students, colleges, min_days=1):
+    """Periods in the range with no evaluation running, at least ``min_days`` long."""
+    coverage = coverage_timeline(min_students, colleges)
+    return [
+        (pd.Timestamp(start), pd.Timestamp(end))
+        for start, end in coverage.downtime(range_start, range_end,
+                                            min_duration=pd.Timedelta(days=min_days).to_timedelta64())
+    ]
+
+def section_figure(sections):
+    # One bar per section
     fig = px.timeline(
-        summer_data,
+        sections,
         x_start="TCE_INVITE",
         x_end="TCE_END_DATE",
         y="SECTION_KEY",
@@ -100,14 +102,51 @@ def update_dashboard(hover_data):
             'DURATION': 'Duration (days)'
         }
     )
-    
     fig.update_yaxes(autorange="reversed")
+    return fig
+
+def daily_figure(sections, range_start, range_end):
+    # Too many sections to draw individually: open evaluations per day instead
+    days = pd.date_range(pd.Timestamp(range_start).normalize(),
+                         pd.Timestamp(range_end).normalize() + pd.Timedelta(days=1), freq='D')
+    starts = sections['TCE_INVITE'].to_numpy()
+    ends = sections['TCE_END_DATE'].to_numpy()
+    edges = days.to_numpy()
+    daily = pd.DataFrame({
+        'DAY': days[:-1],
+        'SECTIONS': overlaps_per_bin(starts, ends, edges),
+        'STUDENTS': overlaps_per_bin(starts, ends, edges, sections['STUDENT_COUNT'].to_numpy()),
+    })
+    return px.bar(
+        daily,
+        x='DAY',
+        y='SECTIONS',
+        color='STUDENTS',
+        color_continuous_scale='Viridis',
+        title=f"Open Course Evaluations per Day ({len(sections)} sections)",
+        labels={'DAY': 'Day', 'SECTIONS': 'Open evaluations', 'STUDENTS': 'Students'}
+    )
+
+@lru_cache(maxsize=32)
+def build_view(range_start, range_end, min_students, colleges):
+    """
+    Figure, statistics and downtime list for one combination of controls.
+
+    The data is loaded once at startup, so the controls fully determine the
+    output and each combination is only computed once.
+    """
+    sections = select_sections(range_start, range_end, min_students, colleges)
+
+    if len(sections) > MAX_SECTION_BARS:
+        fig = daily_figure(sections, range_start, range_end)
+    else:
+        fig = section_figure(sections)
     fig.update_layout(height=600)
     
     # Calculate statistics
-    total_courses = len(summer_data)
-    avg_students = summer_data['STUDENT_COUNT'].mean()
-    active_days = summer_data['DURATION'].mean()
+    total_courses = len(sections)
+    avg_students = sections['STUDENT_COUNT'].mean() if total_courses else 0
+    active_days = sections['DURATION'].mean() if total_courses else 0
     
     stats = [
         html.P(f"Total Courses: {total_courses}"),
@@ -115,40 +154,7 @@ def update_dashboard(hover_data):
         html.P(f"Avg Evaluation Duration: {active_days:.1f} days")
     ]
     
-    # Find downtime periods
-    timeline = []
-    for _, row in summer_data.iterrows():
-        timeline.append((row['TCE_INVITE'], 'start'))
-        timeline.append((row['TCE_END_DATE'], 'end'))
-    
-    timeline.sort(key=lambda x: x[0])
-    
-    downtime_periods = []
-    active_evaluations = 0
-    prev_time = datetime.datetime(2025, 6, 1)
-    
-    for time, event in timeline:
-        if active_evaluations == 0 and prev_time < time:
-            downtime_periods.append((prev_time, time))
-        
-        if event == 'start':
-            active_evaluations += 1
-        else:
-            active_evaluations -= 1
-        
-        prev_time = time
-    
-    # Add potential downtime after last evaluation ends
-    last_day = datetime.datetime(2025, 8, 31, 23, 59, 59)
-    if active_evaluations == 0 and prev_time < last_day:
-        downtime_periods.append((prev_time, last_day))
-    
-    # Filter meaningful downtimes (at least 1 day)
-    meaningful_downtimes = [
-        (start, end) for start, end in downtime_periods 
-        if (end - start) >= datetime.timedelta(days=1)
-    ]
-    
+    meaningful_downtimes = find_downtime(range_start, range_end, min_students, colleges)
     downtime_items = [
         html.Li(f"{start.strftime('%b %d')} to {end.strftime('%b %d')} ({(end-start).days} days)")
         for start, end in meaningful_downtimes
@@ -156,5 +162,73 @@ def update_dashboard(hover_data):
     
     return fig, stats, downtime_items
 
+# Create Dash app
+app = dash.Dash(__name__)
+
+app.layout = html.Div([
+    html.H1("Course Evaluation Schedule Dashboard", style={'textAlign': 'center'}),
+
+    html.Div([
+        html.Div([
+            html.Label("Date range"),
+            dcc.DatePickerRange(
+                id='date-range',
+                start_date=SUMMER_START.date(),
+                end_date=SUMMER_END.date(),
+                display_format='MMM D, YYYY'
+            )
+        ], style={'width': '30%', 'display': 'inline-block'}),
+
+        html.Div([
+            html.Label("Minimum students per course"),
+            dcc.Input(id='min-students', type='number', min=0, step=1,
+                      value=DEFAULT_MIN_STUDENTS, debounce=True)
+        ], style={'width': '20%', 'display': 'inline-block'}),
+
+        html.Div([
+            html.Label("Colleges"),
+            dcc.Dropdown(
+                id='college-filter',
+                options=sorted(data['CLASS_COLLEGE'].dropna().unique()),
+                multi=True,
+                placeholder="All colleges"
+            )
+        ], style={'width': '45%', 'display': 'inline-block'})
+    ]),
+    
+    html.Div([
+        html.Div([
+            html.H3("Evaluation Timeline"),
+            dcc.Graph(id='timeline-graph')
+        ], style={'width': '80%', 'display': 'inline-block'}),
+        
+        html.Div([
+            html.H3("Course Statistics"),
+            html.Div(id='course-stats')
+        ], style={'width': '18%', 'display': 'inline-block', 'verticalAlign': 'top'})
+    ]),
+    
+    html.Div([
+        html.H3("Downtime Finder"),
+        html.P("Potential downtime periods with no evaluations:"),
+        html.Ul(id='downtime-list')
+    ])
+])
+
+@app.callback(
+    [Output('timeline-graph', 'figure'),
+     Output('course-stats', 'children'),
+     Output('downtime-list', 'children')],
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('min-students', 'value'),
+     Input('college-filter', 'value')]
+)
+def update_dashboard(start_date, end_date, min_students, colleges):
+    # Normalize the inputs so equivalent selections share a cache entry
+    range_start = pd.Timestamp(start_date or SUMMER_START).normalize()
+    range_end = pd.Timestamp(end_date or SUMMER_END).normalize() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    return build_view(range_start, range_end, int(min_students or 0), tuple(sorted(colleges or ())))
+
 if __name__ == '__main__':
-    app.run(debug=True)  # Changed from app.run_server()
\ No newline at end of file
+    app.run(debug=True)  # Changed from app.run_server()
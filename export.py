@@ -0,0 +1,223 @@
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import zipfile
+from contextlib import contextmanager
+import metrics
+from storage import atomic_file
+
+EXPORT_FIELDS = ['source', 'target', 'targetType']
+CHUNK_ROWS = 500
+
+
+def contact_assignments(contact, hierarchy):
+    """
+    Resolve one contact into its ReportViewers (source, target, targetType) rows.
+
+    College and department "All" contacts map to a single C4/D3 node. Course
+    coordinators map to one CRS1 row for a specific course, or to every course
+    under their department that carries their prefix.
+
+    Args:
+        contact (dict): Contact record as loaded by app.load_contacts
+        hierarchy (HierarchyIndex): Loaded hierarchy indexes
+
+    Yields:
+        tuple: (source node id, linkblue, target type)
+    """
+    prefix = contact['prefix'].strip().upper()
+
+    if contact['contact_type'] == 'College' and prefix == 'ALL':
+        node = hierarchy.find(contact['college'], 2)
+        if node:
+            yield (node['node_id'], contact['linkblue'], 'C4')
+        return
+
+    if contact['contact_type'] == 'Department' and prefix == 'ALL':
+        dept_name = contact['department'].replace("Fine Arts - ", "")
+        node = hierarchy.find(dept_name, 3, contact['college'])
+        if node:
+            yield (node['node_id'], contact['linkblue'], 'D3')
+        return
+
+    # Course Coordinator logic
+    dept_node = hierarchy.find(contact['department'], 3, contact['college'])
+    if not dept_node:
+        metrics.log('export_skipped', f"Skipped {contact['linkblue']}: Department {contact['department']} not found",
+                    linkblue=contact['linkblue'], department=contact['department'])
+        return
+
+    if contact['course']:
+        course_node = hierarchy.find_course(f"{prefix} {contact['course'].strip()}",
+                                            dept_node['node_id'])
+        if course_node:
+            yield (course_node['node_id'], contact['linkblue'], 'CRS1')
+    else:
+        for course_node in hierarchy.courses_for_prefix(dept_node['node_id'], prefix):
+            yield (course_node['node_id'], contact['linkblue'], 'CRS1')
+
+
+def iter_assignments(contacts, hierarchy):
+    """Resolve every contact, in contact order, into export rows."""
+    for contact in contacts:
+        yield from contact_assignments(contact, hierarchy)
+
+
+def build_assignments(contacts, hierarchy):
+    return list(iter_assignments(contacts, hierarchy))
+
+
+def iter_csv(rows, chunk_rows=CHUNK_ROWS):
+    """
+    Encode export rows as CSV text in chunks of ``chunk_rows`` rows.
+
+    The header is yielded on its own first so the response starts
+    immediately; only one chunk of encoded text is held at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+class ExportCache:
+    """
+    Holds the last computed export rows, keyed on the contacts and hierarchy
+    versions they were built from. Any contact save or hierarchy reload bumps
+    a version, so a stale result is never served. The key and rows are
+    replaced together as one tuple, so concurrent requests never see the key
+    of one export paired with the rows of another.
+
+    ``hits`` and ``misses`` count lookups for /metrics; they are not locked,
+    so under concurrent requests they are close rather than exact.
+    """
+
+    def __init__(self):
+        self.entry = (None, None)  # (key, rows)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        cached_key, rows = self.entry
+        if cached_key != key:
+            self.misses += 1
+            rows = build()
+            self.entry = (key, rows)
+        else:
+            self.hits += 1
+        return rows
+
+    def stream(self, key, produce):
+        """
+        Iterate the rows for ``key``: from memory on a hit, otherwise from
+        ``produce()`` as it runs, recording them for the next request once
+        the iteration completes.
+        """
+        cached_key, rows = self.entry
+        if cached_key == key:
+            self.hits += 1
+            return iter(rows)
+        self.misses += 1
+        return self._record(key, produce())
+
+    def _record(self, key, rows):
+        recorded = []
+        for row in rows:
+            recorded.append(row)
+            yield row
+        self.entry = (key, recorded)
+
+    def clear(self):
+        self.entry = (None, None)
+
+
+def assignments_digest(rows):
+    """Order-independent SHA-256 of a set of export rows, to identify it in manifests."""
+    digest = hashlib.sha256()
+    for row in sorted(set(rows)):
+        digest.update('\x1f'.join(row).encode('utf-8') + b'\n')
+    return digest.hexdigest()
+
+
+def read_snapshot(path):
+    """
+    Load the rows of the last export recorded by write_snapshot.
+
+    Returns:
+        tuple: (list of rows, info dict with exported time, rows and sha256),
+        or (None, None) if nothing has been exported yet
+    """
+    try:
+        with open(path, 'r', newline='') as f:
+            exported = datetime.datetime.fromtimestamp(os.fstat(f.fileno()).st_mtime)
+            reader = csv.reader(f)
+            next(reader, None)
+            rows = [tuple(row) for row in reader if row]
+    except FileNotFoundError:
+        return None, None
+    info = {'exported': exported.isoformat(timespec='seconds'), 'rows': len(set(rows)),
+            'sha256': assignments_digest(rows)}
+    return rows, info
+
+
+@contextmanager
+def snapshot_writer(path):
+    """
+    Record an export row by row as the new snapshot; yields a function taking one row.
+
+    The snapshot at ``path`` is replaced (atomically, see storage.atomic_file)
+    only when the block completes, so an export abandoned part-way through
+    leaves the previous one as the base for deltas.
+    """
+    with atomic_file(path) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(EXPORT_FIELDS)
+        yield writer.writerow
+
+
+def write_snapshot(rows, path):
+    """Record ``rows`` as the last export, replacing the previous snapshot atomically."""
+    with snapshot_writer(path) as write_row:
+        for row in rows:
+            write_row(row)
+
+
+def assignment_delta(previous, current):
+    """
+    Rows to add and rows to remove to turn the ``previous`` export into ``current``.
+
+    A row whose targetType changed appears as a remove of the old row and an
+    add of the new one. Each list keeps the order of the export it came from.
+    """
+    previous_set = set(previous)
+    current_set = set(current)
+    adds = [row for row in dict.fromkeys(current) if row not in previous_set]
+    removes = [row for row in dict.fromkeys(previous) if row not in current_set]
+    return adds, removes
+
+
+def delta_zip(adds, removes, manifest):
+    """Package a delta export as a zip of adds.csv, removes.csv and manifest.json."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('adds.csv', ''.join(iter_csv(adds)))
+        archive.writestr('removes.csv', ''.join(iter_csv(removes)))
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    return buffer.getvalue()
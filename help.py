@@ -1,55 +1,111 @@
+import argparse
 import pandas as pd
 from collections import defaultdict
 
-def analyze_course_quality(csv_file_path):
+QUALITY_COLUMNS = ['SECT_CRS_QUAL20', 'SECT_INS_QUAL21']
+TERM_COLUMNS = ['AYEAR', 'ATERM']
+# Columns for the optional second grouping; any other column name can be passed as-is
+GROUP_COLUMNS = {
+    'college': 'COLLEGE',
+    'department': 'DEPARTMENT',
+    'instructor': 'PERSONID',
+}
+
+
+def term_sums(df, keys):
+    """
+    Per-group score sums and record counts for one frame (or chunk) of TCE results.
+
+    Sums and counts rather than means so the partial results of several
+    chunks can be added together before the means are taken.
+    """
+    df = df[(df['SECT_CRS_QUAL20'] > 0) & (df['SECT_INS_QUAL21'] > 0)]
+    return df.groupby(keys, sort=False).agg(
+        course_sum=('SECT_CRS_QUAL20', 'sum'),
+        instructor_sum=('SECT_INS_QUAL21', 'sum'),
+        count=('SECT_CRS_QUAL20', 'size'),
+    )
+
+
+def quality_rollup(csv_file_path, group_by=None, chunksize=None):
+    """
+    Course and instructor quality means per term, optionally split by another column.
+
+    Args:
+        csv_file_path (str): Path to the CSV file of TCE results
+        group_by (str): Key of GROUP_COLUMNS or a column name, or None for terms only
+        chunksize (int): Read the file this many rows at a time, for files larger than memory
+
+    Returns:
+        DataFrame: One row per term (and group) in chronological order, with
+        term, course_mean, instructor_mean and count
+    """
+    group_column = GROUP_COLUMNS.get(group_by, group_by)
+    keys = TERM_COLUMNS + ([group_column] if group_column else [])
+    # Only the columns the roll-up needs are parsed; term codes stay text to keep leading zeros
+    reader = pd.read_csv(csv_file_path, usecols=keys + QUALITY_COLUMNS,
+                         dtype={'AYEAR': str, 'ATERM': str}, chunksize=chunksize)
+
+    if chunksize:
+        totals = None
+        for chunk in reader:
+            sums = term_sums(chunk, keys)
+            totals = sums if totals is None else totals.add(sums, fill_value=0)
+    else:
+        totals = term_sums(reader, keys)
+
+    if totals is None or totals.empty:
+        return pd.DataFrame(columns=['term'] + keys[2:] + ['course_mean', 'instructor_mean', 'count'])
+
+    totals = totals.reset_index()
+    totals['ATERM'] = totals['ATERM'].str.zfill(3)
+    totals = totals.sort_values(keys, kind='stable', ignore_index=True)
+    totals.insert(0, 'term', 'Term ' + totals['ATERM'] + '-' + totals['AYEAR'])
+    totals['course_mean'] = (totals['course_sum'] / totals['count']).round(2)
+    totals['instructor_mean'] = (totals['instructor_sum'] / totals['count']).round(2)
+    totals['count'] = totals['count'].astype(int)
+    return totals[['term'] + keys[2:] + ['course_mean', 'instructor_mean', 'count']]
+
+
+def analyze_course_quality(csv_file_path, group_by=None, chunksize=None):
     """
     Analyze course and instructor quality scores by academic year and semester.
     
     Args:
         csv_file_path (str): Path to the CSV file containing course data
+        group_by (str): Optional college/department/instructor (see GROUP_COLUMNS)
+        chunksize (int): Optional number of rows to read at a time
     
     Returns:
-        dict: Grouped averages by semester
+        dict: Averages keyed by term label, or by (term label, group) when grouped
     """
-    
-    # Read the CSV file
     try:
-        df = pd.read_csv(csv_file_path)
+        rollup = quality_rollup(csv_file_path, group_by, chunksize)
     except FileNotFoundError:
         print(f"Error: File '{csv_file_path}' not found.")
         return None
     except Exception as e:
         print(f"Error reading file: {e}")
         return None
-    
-    # Filter out rows where quality scores are 0 or NaN
-    df_filtered = df[(df['SECT_CRS_QUAL20'] > 0) & (df['SECT_INS_QUAL21'] > 0)]
-    
-    # Create term labels combining ATERM and AYEAR
-    def create_term_label(row):
-        year = str(row['AYEAR'])
-        term = str(row['PERSONID'])  # Pad with zeros to make it 3 digits
-        return f"Term {term}-{year}"
-    
-    df_filtered['term'] = df_filtered.apply(create_term_label, axis=1)
-    
-    # Group by term and calculate means
+
     results = {}
-    grouped = df_filtered.groupby('term')
-    
-    for term, group in grouped:
-        course_mean = group['SECT_CRS_QUAL20'].mean()
-        instructor_mean = group['SECT_INS_QUAL21'].mean()
-        count = len(group)
-        
-        results[term] = {
-            'course_mean': round(course_mean, 2),
-            'instructor_mean': round(instructor_mean, 2),
-            'count': count
+    for row in rollup.itertuples(index=False):
+        key = row[0] if rollup.columns[1] == 'course_mean' else (row[0], row[1])
+        results[key] = {
+            'course_mean': row.course_mean,
+            'instructor_mean': row.instructor_mean,
+            'count': row.count
         }
-    
     return results
 
+
+def write_results(rollup, output_path):
+    """Write a quality_rollup() frame to .json (list of records) or .csv, by extension."""
+    if output_path.lower().endswith('.json'):
+        rollup.to_json(output_path, orient='records', indent=2)
+    else:
+        rollup.to_csv(output_path, index=False)
+
 def print_results(results):
     """Print the results in a formatted way."""
     if not results:
@@ -59,12 +115,9 @@ def print_results(results):
     print("Course and Instructor Quality Averages by Term")
     print("=" * 50)
     
-    # Sort by term
-    sorted_terms = sorted(results.keys())
-    
-    for term in sorted_terms:
-        data = results[term]
-        print(f"\n{term}")
+    # Results are already in chronological order
+    for term, data in results.items():
+        print(f"\n{term if isinstance(term, str) else ' / '.join(map(str, term))}")
         print(f"- Instructor mean = {data['instructor_mean']}")
         print(f"- Course mean = {data['course_mean']}")
         print(f"- Number of records = {data['count']}")
@@ -101,17 +154,20 @@ def analyze_sample_data():
 
 # Main execution
 if __name__ == "__main__":
-    # print("=== SAMPLE DATA ANALYSIS ===")
-    # sample_results = analyze_sample_data()
-    # print_results(sample_results)
-    
-    # print("\n" + "="*60)
-    print("To analyze your own CSV file, use:")
-    print("results = analyze_course_quality('your_file.csv')")
-    print("print_results(results)")
-    
-    results = analyze_course_quality('/Users/elnoelakwa/Downloads/data.csv')
-    print_results(results)
-    # Example usage with actual file:
-    # results = analyze_course_quality('course_data.csv')
-    # print_results(results)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Course and instructor quality averages by term.")
+    parser.add_argument('csv_file', help="CSV of TCE results (AYEAR, ATERM, SECT_CRS_QUAL20, SECT_INS_QUAL21)")
+    parser.add_argument('--by', help="Also group by college, department, instructor or a column name")
+    parser.add_argument('--chunksize', type=int,
+                        help="Read this many rows at a time (for files larger than memory)")
+    parser.add_argument('--output', help="Write the roll-up to this .csv or .json file")
+    args = parser.parse_args()
+
+    if args.output:
+        try:
+            rollup = quality_rollup(args.csv_file, args.by, args.chunksize)
+        except (FileNotFoundError, ValueError) as e:
+            parser.error(str(e))
+        write_results(rollup, args.output)
+        print(f"Wrote {len(rollup)} rows to {args.output}")
+    else:
+        print_results(analyze_course_quality(args.csv_file, args.by, args.chunksize))
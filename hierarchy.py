@@ -0,0 +1,219 @@
+import csv
+import datetime
+import itertools
+import os
+import time
+from collections import defaultdict
+
+_versions = itertools.count(1)
+
+
+def normalize_course_no(course_no):
+    """Normalize a course number like ' a&s   110 ' to 'A&S 110' for lookups."""
+    if not course_no:
+        return ''
+    return ' '.join(course_no.split()).upper()
+
+
+class HierarchyIndex:
+    """
+    Dictionary indexes over the hierarchy nodes loaded from hierarchy.csv.
+
+    Every lookup the app needs (by node id, by caption and level, by parent
+    and level, by department and prefix, by course number) is a dict hit
+    instead of a scan over the full node list. Node ids are not unique in
+    hierarchy.csv, so the first node seen for an id wins, matching the
+    behaviour of the old linear scans.
+    """
+
+    def __init__(self):
+        self.version = next(_versions)  # Changes whenever a new hierarchy is loaded
+        self.nodes = []
+        self.stats = {}
+        self.etag = ''
+        self.last_modified = None
+        self.typeahead = None  # Search index, built by the app on first use (see hierarchy_typeahead)
+        self.by_id = {}
+        self.by_level = defaultdict(list)
+        self.by_caption_level = defaultdict(list)
+        self.by_parent_level = defaultdict(list)
+        self.by_dept_prefix = defaultdict(list)
+        self.by_course_no = defaultdict(list)
+
+    def add(self, node):
+        self.nodes.append(node)
+        self.by_id.setdefault(node['node_id'], node)
+        self.by_level[node['level']].append(node)
+        self.by_caption_level[(node['caption'], node['level'])].append(node)
+        self.by_parent_level[(node['parent_id'], node['level'])].append(node)
+        if node['level'] == 4:
+            self.by_dept_prefix[(node['parent_id'], node['prefix'])].append(node)
+            self.by_course_no[normalize_course_no(node['course_no'])].append(node)
+
+    def get(self, node_id):
+        return self.by_id.get(node_id)
+
+    def at_level(self, level):
+        return self.by_level.get(level, [])
+
+    def find(self, caption, level, parent_caption=None):
+        for node in self.by_caption_level.get((caption, level), ()):
+            if not parent_caption:
+                return node
+            parent = self.by_id.get(node['parent_id'])
+            if parent and parent['caption'] == parent_caption:
+                return node
+        return None
+
+    def children(self, parent_id, level):
+        return self.by_parent_level.get((parent_id, level), [])
+
+    def courses_for_prefix(self, department_id, prefix):
+        return self.by_dept_prefix.get((department_id, prefix.upper()), [])
+
+    def find_course(self, course_no, department_id):
+        for node in self.by_course_no.get(normalize_course_no(course_no), ()):
+            if node['parent_id'] == department_id:
+                return node
+        return None
+
+
+def file_etag(source):
+    """Version tag of a file from its os.stat() result: changes when it is rewritten."""
+    return f"{source.st_mtime_ns:x}-{source.st_size:x}"
+
+
+def load_hierarchy_csv(path):
+    """
+    Stream hierarchy.csv into a HierarchyIndex in a single linear pass.
+
+    Parents are looked up through the id index when needed rather than
+    linked while loading, so rows can come in any order. Departments whose
+    college is missing from the file are counted in ``stats['unresolved']``.
+    A short or malformed row raises ValueError naming its line.
+
+    Args:
+        path (str): Path to hierarchy.csv
+
+    Returns:
+        HierarchyIndex: Populated index, with load timings in ``stats``
+    """
+    started = time.perf_counter()
+    index = HierarchyIndex()
+
+    with open(path, 'r', newline='') as f:
+        # Identify this version of the file for HTTP caching and reload checks; stat the
+        # open file so the tag matches the contents even if the path is replaced meanwhile
+        source = os.fstat(f.fileno())
+        index.etag = file_etag(source)
+        index.last_modified = datetime.datetime.fromtimestamp(source.st_mtime, datetime.timezone.utc)
+
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return index
+        col = {name: i for i, name in enumerate(header)}
+        i_id = col['Node Id']
+        i_caption = col['Node Caption']
+        i_parent = col['Parent Node Id']
+        i_level = col['Level']
+        i_course = col['CourseNo']
+
+        width = max(i_id, i_caption, i_parent, i_level, i_course) + 1
+        try:
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < width:
+                    raise ValueError(f"expected {width} fields, got {len(row)}")
+                level = int(row[i_level])
+                node = {
+                    'node_id': row[i_id],
+                    'caption': row[i_caption],
+                    'parent_id': row[i_parent],
+                    'level': level,
+                    'course_no': row[i_course] if level == 4 else None
+                }
+
+                if level == 4:
+                    # Prefix and number come from CourseNo ("A&S 110"); the caption is the course title
+                    parts = node['course_no'].split(None, 1)
+                    node['prefix'] = parts[0].upper() if len(parts) > 1 else ''
+                    node['course_num'] = parts[1] if len(parts) > 1 else node['course_no']
+
+                index.add(node)
+        except (csv.Error, ValueError) as e:
+            # A file being replaced in place can end part way through a row
+            raise ValueError(f"{path} line {reader.line_num}: {e}") from e
+
+    unresolved = sum(1 for node in index.at_level(3) if node['parent_id'] not in index.by_id)
+
+    elapsed = time.perf_counter() - started
+    rows = len(index.nodes)
+    index.stats = {
+        'rows': rows,
+        'unresolved': unresolved,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf')
+    }
+    return index
+
+
+def _node_key(node):
+    # A node is the same node across versions if its id, level and parent are unchanged
+    return (node['level'], node['node_id'], node['parent_id'])
+
+
+def _keyed_nodes(index):
+    # Rows sharing a key (cross-listed courses) are told apart by their order in the file
+    keyed = {}
+    occurrences = defaultdict(int)
+    for node in index.nodes:
+        key = _node_key(node)
+        keyed[key + (occurrences[key],)] = node
+        occurrences[key] += 1
+    return keyed, occurrences
+
+
+def _node_json(node):
+    return {'node_id': node['node_id'], 'caption': node['caption'], 'parent_id': node['parent_id'],
+            'level': node['level'], 'course_no': node['course_no']}
+
+
+def diff_hierarchies(old, new):
+    """
+    Compare two hierarchies node by node.
+
+    Nodes are matched on (level, node id, parent id), so a node that moved
+    to another parent shows up as removed and added. hierarchy.csv repeats
+    some keys (cross-listed courses); those rows are matched in file order,
+    so a change to any of them is reported, and the repeated keys of the new
+    hierarchy are listed under ``duplicates``.
+
+    The diff is a report: the app swaps in a reloaded file whenever its rows
+    differ at all (see app.reload_hierarchy).
+
+    Args:
+        old (HierarchyIndex): Previous hierarchy
+        new (HierarchyIndex): Replacement hierarchy
+
+    Returns:
+        dict: ``added`` and ``removed`` node lists, ``renamed`` nodes whose
+        caption or course number changed (with ``old_caption`` and
+        ``old_course_no``), and ``duplicates``: level, node_id, parent_id and
+        number of rows for each key that appears more than once
+    """
+    old_nodes, _ = _keyed_nodes(old)
+    new_nodes, occurrences = _keyed_nodes(new)
+
+    added = [_node_json(n) for key, n in new_nodes.items() if key not in old_nodes]
+    removed = [_node_json(n) for key, n in old_nodes.items() if key not in new_nodes]
+    renamed = []
+    for key, node in new_nodes.items():
+        before = old_nodes.get(key)
+        if before and (before['caption'], before['course_no']) != (node['caption'], node['course_no']):
+            renamed.append(dict(_node_json(node), old_caption=before['caption'],
+                                old_course_no=before['course_no']))
+    duplicates = [{'level': key[0], 'node_id': key[1], 'parent_id': key[2], 'rows': count}
+                  for key, count in occurrences.items() if count > 1]
+    return {'added': added, 'removed': removed, 'renamed': renamed, 'duplicates': duplicates}
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+
+def coverage_gaps(starts, ends):
+    """
+    Find every stretch of time not covered by any of the given intervals.
+
+    Intervals are sorted by start and swept once: the running maximum of the
+    end times says how far coverage reaches so far, and a gap exists wherever
+    the next interval starts after that point. Unlike comparing each interval
+    with its immediate neighbour, this is correct when one long interval
+    covers several later ones.
+
+    Args:
+        starts (array-like): Interval start times (datetime64 or numeric)
+        ends (array-like): Interval end times, same length as ``starts``
+
+    Returns:
+        dict: Arrays ``start`` and ``end`` of each gap in time order, plus
+        ``previous`` and ``next``: positions (into the input arrays) of the
+        interval whose end opens the gap and the interval whose start closes it
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    if len(starts) < 2:
+        empty = np.array([], dtype=np.intp)
+        return {'start': starts[:0], 'end': ends[:0], 'previous': empty, 'next': empty}
+
+    order = np.argsort(starts, kind='stable')
+    sorted_starts = starts[order]
+    sorted_ends = ends[order]
+    reach = np.maximum.accumulate(sorted_ends)
+
+    # Position of the interval that set the current reach (running argmax)
+    positions = np.arange(len(order))
+    owner = np.maximum.accumulate(np.where(sorted_ends == reach, positions, 0))
+
+    gap_at = np.flatnonzero(sorted_starts[1:] > reach[:-1])
+    return {
+        'start': reach[gap_at],
+        'end': sorted_starts[gap_at + 1],
+        'previous': order[owner[gap_at]],
+        'next': order[gap_at + 1],
+    }
+
+
+def gap_summary(gaps, unit=np.timedelta64(1, 'D')):
+    """
+    Summary statistics for the result of ``coverage_gaps``.
+
+    Durations are whole ``unit``s rounded down, matching timedelta.days.
+
+    Returns:
+        dict: ``durations`` array plus count, total, mean, median and the
+        index of the longest gap (None when there are no gaps)
+    """
+    durations = (gaps['end'] - gaps['start']) // unit
+    if not len(durations):
+        return {'durations': durations, 'count': 0, 'total': 0, 'mean': 0.0,
+                'median': 0.0, 'longest': None}
+    return {
+        'durations': durations,
+        'count': int(len(durations)),
+        'total': int(durations.sum()),
+        'mean': float(durations.mean()),
+        'median': float(np.median(durations)),
+        'longest': int(np.argmax(durations)),
+    }
+
+
+def evaluation_gaps(df):
+    """
+    Find every period with no course evaluation running.
+
+    Each row is an evaluation period from TCE_INVITE to TCE_END_DATE; gaps are
+    found with the coverage_gaps sweep, so this scales to
+    millions of sections and is shared with the downtime dashboard.
+
+    Args:
+        df (DataFrame): Rows with SECTION_KEY, ACADEMIC_TERM, TCE_INVITE and
+            TCE_END_DATE, no missing dates
+
+    Returns:
+        dict: Dictionary containing gap information
+    """
+    starts = pd.to_datetime(df['TCE_INVITE']).to_numpy()
+    ends = pd.to_datetime(df['TCE_END_DATE']).to_numpy()
+    courses = df['SECTION_KEY'].to_numpy()
+    terms = df['ACADEMIC_TERM'].to_numpy()
+
+    date_range = f"{pd.Timestamp(starts.min()).date()} to {pd.Timestamp(ends.max()).date()}"
+    gaps = coverage_gaps(starts, ends)
+    summary = gap_summary(gaps)
+
+    if not summary['count']:
+        return {
+            'longest_gap_days': 0,
+            'message': 'No gaps found - evaluation periods overlap or are continuous',
+            'total_evaluation_periods': len(df),
+            'date_range': date_range
+        }
+
+    all_gaps = [{
+        'gap_start': pd.Timestamp(gap_start),
+        'gap_end': pd.Timestamp(gap_end),
+        'duration_days': int(duration),
+        'previous_course': courses[previous],
+        'next_course': courses[following],
+        'previous_term': terms[previous],
+        'next_term': terms[following]
+    } for gap_start, gap_end, duration, previous, following in zip(
+        gaps['start'], gaps['end'], summary['durations'], gaps['previous'], gaps['next'])]
+
+    # Find the longest gap
+    longest_gap = all_gaps[summary['longest']]
+
+    return {
+        'longest_gap_days': longest_gap['duration_days'],
+        'longest_gap_start': longest_gap['gap_start'].date(),
+        'longest_gap_end': longest_gap['gap_end'].date(),
+        'previous_course': longest_gap['previous_course'],
+        'next_course': longest_gap['next_course'],
+        'previous_term': longest_gap['previous_term'],
+        'next_term': longest_gap['next_term'],
+        'total_gaps_found': summary['count'],
+        'total_gap_days': summary['total'],
+        'average_gap_days': round(summary['mean'], 1),
+        'median_gap_days': round(summary['median'], 1),
+        'all_gaps': all_gaps,
+        'total_evaluation_periods': len(df),
+        'evaluation_date_range': date_range
+    }
+
+
+class CoverageTimeline:
+    """
+    Number of active intervals over time, as a precomputed step function.
+
+    ``times`` holds every distinct start/end time in order and ``counts[i]``
+    is the number of intervals active on ``[times[i], times[i + 1])``
+    (intervals are treated as half-open, so one ending exactly when another
+    starts leaves no hole). Building it takes two sorts; after that the queries
+    are binary searches, so it can be built once at load and queried from
+    interactive callbacks. The idle stretches come from ``coverage_gaps``,
+    the same sweep the evaluation gap report uses.
+
+    Args:
+        starts (array-like): Interval start times (datetime64 or numeric)
+        ends (array-like): Interval end times, same length as ``starts``
+    """
+
+    def __init__(self, starts, ends):
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        events = np.concatenate([starts, ends])
+        deltas = np.concatenate([np.ones(len(starts), dtype=np.int64),
+                                 -np.ones(len(ends), dtype=np.int64)])
+        self.times, slot = np.unique(events, return_inverse=True)
+        self.counts = np.cumsum(np.bincount(slot, weights=deltas,
+                                            minlength=len(self.times))).astype(np.int64)
+
+        # Stretches with nothing active between the first start and the last end
+        gaps = coverage_gaps(starts, ends)
+        self.idle_starts = gaps['start']
+        self.idle_ends = gaps['end']
+
+    def active_at(self, when):
+        """Number of intervals active at ``when`` (a scalar or an array of times)."""
+        if not len(self.times):
+            return np.zeros(np.shape(when), dtype=np.int64)
+        i = np.searchsorted(self.times, np.asarray(when, dtype=self.times.dtype), side='right') - 1
+        return np.where(i >= 0, self.counts[np.maximum(i, 0)], 0)
+
+    def downtime(self, range_start, range_end, min_duration=None):
+        """
+        Periods inside ``[range_start, range_end]`` with no interval active.
+
+        Args:
+            range_start: Start of the window to search
+            range_end: End of the window to search
+            min_duration: Optional minimum length for a period to be reported
+
+        Returns:
+            list: (start, end) pairs in time order, clipped to the window
+        """
+        if not len(self.times):
+            if range_end <= range_start or (min_duration is not None
+                                            and range_end - range_start < min_duration):
+                return []
+            return [(range_start, range_end)]
+        range_start = np.asarray(range_start, dtype=self.times.dtype)
+        range_end = np.asarray(range_end, dtype=self.times.dtype)
+        # Before the first start and after the last end count as idle too
+        starts = np.concatenate([[range_start], self.idle_starts, [self.times[-1]]])
+        ends = np.concatenate([[self.times[0]], self.idle_ends, [range_end]])
+        starts = np.maximum(starts, range_start)
+        ends = np.minimum(ends, range_end)
+        keep = ends > starts
+        if min_duration is not None:
+            keep &= (ends - starts) >= min_duration
+        return list(zip(starts[keep], ends[keep]))
+
+
+def overlaps_per_bin(starts, ends, edges, weights=None):
+    """
+    Count (or weight) the intervals overlapping each bin ``[edges[i], edges[i + 1])``.
+
+    An interval overlaps a bin when it starts before the bin ends and ends
+    after the bin starts, so the count is "started before the bin's end"
+    minus "ended by the bin's start", both read off sorted arrays with
+    searchsorted. Used to aggregate thousands of sections into daily bars.
+
+    Args:
+        starts (array-like): Interval start times
+        ends (array-like): Interval end times
+        edges (array-like): Increasing bin edges, one more than the number of bins
+        weights (array-like): Optional weight per interval (e.g. student count)
+
+    Returns:
+        ndarray: One value per bin
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    edges = np.asarray(edges, dtype=starts.dtype)
+    start_order = np.argsort(starts, kind='stable')
+    end_order = np.argsort(ends, kind='stable')
+    started = np.searchsorted(starts[start_order], edges[1:], side='left')
+    ended = np.searchsorted(ends[end_order], edges[:-1], side='right')
+    if weights is None:
+        return started - ended
+    weights = np.asarray(weights, dtype=float)
+    started_weight = np.concatenate([[0.0], np.cumsum(weights[start_order])])
+    ended_weight = np.concatenate([[0.0], np.cumsum(weights[end_order])])
+    return started_weight[started] - ended_weight[ended]
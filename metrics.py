@@ -0,0 +1,188 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+
+# LOG_FORMAT=json writes log messages, plus one line per request with its
+# timings, as JSON objects; otherwise messages are printed as plain text
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+
+REQUEST_SECONDS = 'contactweb_request_seconds'
+OPERATION_SECONDS = 'contactweb_operation_seconds'
+# Histogram buckets in seconds; the last bucket (+Inf) is implied
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HELP = {
+    REQUEST_SECONDS: ('histogram', "Time to handle a request, including sending a streamed body."),
+    OPERATION_SECONDS: ('histogram', "Time spent in named hot-path operations (hierarchy_lookup, "
+                                     "validation, persistence, csv_generation, ...)."),
+}
+
+_lock = threading.Lock()
+_histograms = {}  # name -> {sorted label tuple: [bucket counts..., sum, count]}
+_gauges = {}  # name -> {sorted label tuple: value}
+
+
+def observe(name, seconds, **labels):
+    """Record one duration in the histogram ``name``."""
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                values[i] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+
+def set_gauge(name, value, help_text=None, kind='gauge', **labels):
+    """Set a value reported as is; use kind='counter' for totals kept elsewhere (like cache hits)."""
+    with _lock:
+        if help_text and name not in HELP:
+            HELP[name] = (kind, help_text)
+        _gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+
+def _request_timings():
+    # Per-request totals by operation, for the request's log line
+    return g.setdefault('metric_timings', {}) if has_request_context() else None
+
+
+def _add_timing(timings, operation, seconds):
+    if timings is not None:
+        timings[operation] = timings.get(operation, 0.0) + seconds
+
+
+@contextmanager
+def timer(operation):
+    """Time the block as ``operation`` (also added to the current request's log line)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        observe(OPERATION_SECONDS, seconds, operation=operation)
+        _add_timing(_request_timings(), operation, seconds)
+
+
+def timed(operation):
+    """Decorator form of ``timer``."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(operation):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_iter(operation, items):
+    """
+    Pass ``items`` through, timing only the work of producing them.
+
+    For streamed responses: time spent waiting on the client between items
+    is not counted, and the total is recorded once the iterator is done.
+    """
+    timings = _request_timings()  # Captured now: the items are produced after the request returns
+    return _timed_items(operation, items, timings)
+
+
+def _timed_items(operation, items, timings):
+    total = 0.0
+    iterator = iter(items)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                total += time.perf_counter() - started
+                break
+            total += time.perf_counter() - started
+            yield item
+    finally:
+        observe(OPERATION_SECONDS, total, operation=operation)
+        _add_timing(timings, operation, total)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}' if pairs else ''
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for name, series in sorted(_histograms.items()):
+            kind, help_text = HELP.get(name, ('histogram', name))
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, values in sorted(series.items()):
+                for bound, count in zip(BUCKETS, values):
+                    lines.append(f"{name}_bucket{_labels(key + (('le', repr(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {values[-1]}")
+                lines.append(f"{name}_sum{_labels(key)} {values[-2]!r}")
+                lines.append(f"{name}_count{_labels(key)} {values[-1]}")
+        for name, series in sorted(_gauges.items()):
+            kind, help_text = HELP.get(name, ('gauge', name))
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_labels(key)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def log(event, message, **fields):
+    """Print ``message``, or with LOG_FORMAT=json a JSON object with the event name and fields."""
+    if LOG_FORMAT == 'json':
+        record = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'event': event, 'message': message}
+        record.update(fields)
+        print(json.dumps(record, default=str), flush=True)
+    else:
+        print(message)
+
+
+def init_app(app):
+    """
+    Time every request. Call right after creating the app so the timing covers
+    the other before_request hooks too.
+
+    Streamed responses (like /export) are recorded when the response is
+    closed, so the time to produce the body counts in full. Requests are
+    labelled by endpoint, not path, to keep the number of series bounded.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.metric_started = time.perf_counter()
+        g.metric_timings = {}
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('metric_started')
+        if started is None:
+            return response
+        timings = g.metric_timings
+        method, path = request.method, request.path
+        endpoint = request.endpoint or 'none'
+        status = response.status_code
+
+        def finished():
+            seconds = time.perf_counter() - started
+            observe(REQUEST_SECONDS, seconds, method=method, endpoint=endpoint, status=status)
+            if LOG_FORMAT == 'json':
+                log('request', f"{method} {path} {status}", method=method, path=path,
+                    endpoint=endpoint, status=status, ms=round(seconds * 1000, 3),
+                    timings_ms={k: round(v * 1000, 3) for k, v in timings.items()})
+
+        if response.is_streamed:
+            response.call_on_close(finished)  # Once the body has been sent
+        else:
+            finished()
+        return response
@@ -0,0 +1,221 @@
+from collections import defaultdict
+
+# Fields the contact list can be filtered on exactly
+FILTER_FIELDS = ('contact_type', 'college', 'primary_contact')
+
+
+def _department_sort_key(contact):
+    # College contacts show as "All" and sort ahead of named departments
+    if contact['contact_type'] == 'College':
+        return (0, '')
+    return (1, contact['department'].strip().lower())
+
+
+def primary_scope(contact):
+    """
+    The scope in which ``contact`` must be the only primary contact, or None if it is not primary.
+
+    College contacts are unique per college, department-wide contacts per
+    department, and course coordinators per department, prefix and course
+    (an empty course meaning every course with the prefix), mirroring how
+    export.contact_assignments resolves them.
+    """
+    if not contact['primary_contact']:
+        return None
+    if contact['contact_type'] == 'College':
+        return ('college', contact['college'])
+    prefix = contact['prefix'].strip().upper()
+    if contact['contact_type'] == 'Department' and prefix in ('ALL', ''):
+        return ('department', contact['college'], contact['department'])
+    return ('course', contact['college'], contact['department'], prefix, contact['course'].strip())
+
+
+SORT_KEYS = {
+    'name': lambda c: f"{c['first_name']} {c['last_name']}".strip().lower(),
+    'linkblue': lambda c: c['linkblue'].strip().lower(),
+    'type': lambda c: c['contact_type'].lower(),
+    'college': lambda c: c['college'].strip().lower(),
+    'primary': lambda c: 'yes' if c['primary_contact'] else 'no',
+    'department': _department_sort_key,
+}
+
+
+class ContactRegistry:
+    """
+    Contacts keyed by id, in insertion order.
+
+    Ids are handed out from a monotonic counter and never reused, so an id in
+    a bookmark or an earlier export keeps pointing at the same contact (or at
+    nothing) after other contacts are deleted. Iterating the registry yields
+    the contact dicts, so it can be used wherever the old contacts list was.
+
+    Readers never see a registry change under them: writers change a
+    ``copy()`` and publish it in place of the original, and contact dicts are
+    replaced rather than edited, so a registry (and the contacts it returned)
+    stays as it was for as long as someone holds it.
+    """
+
+    def __init__(self, contacts=(), next_id=1):
+        self.by_id = {}
+        self.by_field = {field: defaultdict(set) for field in FILTER_FIELDS}
+        self.search_text = {}  # id -> lowercased "first last linkblue"
+        self.primaries = defaultdict(set)  # primary_scope -> ids of the primary contacts in it
+        self.version = 0
+        self._sorted = {}  # (sort key, version) -> ids in sort order
+        for contact in contacts:
+            self.by_id[contact['id']] = contact
+            self._index(contact)
+        highest = max(self.by_id, default=0)
+        self.next_id = max(next_id, highest + 1)
+
+    def copy(self):
+        """A registry with the same contacts that can be changed without affecting this one."""
+        clone = ContactRegistry.__new__(ContactRegistry)
+        clone.by_id = dict(self.by_id)
+        clone.by_field = {field: defaultdict(set, {value: set(ids) for value, ids in index.items()})
+                          for field, index in self.by_field.items()}
+        clone.search_text = dict(self.search_text)
+        clone.primaries = defaultdict(set, {scope: set(ids) for scope, ids in self.primaries.items()})
+        clone.version = self.version
+        clone._sorted = self._sorted  # Never modified in place, so safe to share
+        clone.next_id = self.next_id
+        return clone
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, contact_id):
+        return contact_id in self.by_id
+
+    def get(self, contact_id):
+        return self.by_id.get(contact_id)
+
+    def allocate_id(self):
+        contact_id = self.next_id
+        self.next_id += 1
+        return contact_id
+
+    def add(self, contact):
+        if 'id' not in contact or contact['id'] is None:
+            contact['id'] = self.allocate_id()
+        elif contact['id'] >= self.next_id:
+            self.next_id = contact['id'] + 1
+        self.by_id[contact['id']] = contact
+        self._index(contact)
+        self._changed()
+        return contact
+
+    def update(self, contact_id, fields):
+        self._unindex(self.by_id[contact_id])
+        contact = dict(self.by_id[contact_id])
+        contact.update(fields)
+        self.by_id[contact_id] = contact
+        self._index(contact)
+        self._changed()
+        return contact
+
+    def remove(self, contact_id):
+        contact = self.by_id.pop(contact_id, None)
+        if contact is not None:
+            self._unindex(contact)
+            self._changed()
+        return contact
+
+    def primary_conflict(self, contact):
+        """
+        Id of another contact that is already primary in ``contact``'s scope, or None.
+
+        ``contact`` may be new (no id yet) or an edited copy of an existing
+        contact, which is not counted as conflicting with itself.
+        """
+        scope = primary_scope(contact)
+        if scope is None:
+            return None
+        return next((i for i in self.primaries.get(scope, ()) if i != contact.get('id')), None)
+
+    def query(self, search='', filters=None, sort='name', descending=False, offset=0, limit=50):
+        """
+        Filter, search, sort and page the contacts.
+
+        Exact-match filters are intersected from the per-field id sets, the
+        sort order comes from a cached id list that is only rebuilt after a
+        change, and the name/LinkBlue search is a substring test against the
+        precomputed lowercase text of the remaining candidates.
+
+        Args:
+            search (str): Case-insensitive substring of name or LinkBlue
+            filters (dict): Field name (see FILTER_FIELDS) to required value
+            sort (str): Key of SORT_KEYS
+            descending (bool): Reverse the sort order
+            offset (int): Number of matching contacts to skip
+            limit (int): Maximum number of contacts to return
+
+        Returns:
+            tuple: (total number of matches, list of contacts for the page)
+        """
+        candidates = None
+        for field, value in (filters or {}).items():
+            ids = self.by_field[field].get(value, set())
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return 0, []
+
+        order = self._sorted_ids(sort)
+        if descending:
+            order = order[::-1]
+        search = search.strip().lower()
+        if candidates is None and not search:
+            return len(order), [self.by_id[i] for i in order[offset:offset + limit]]
+
+        total = 0
+        page = []
+        for contact_id in order:
+            if candidates is not None and contact_id not in candidates:
+                continue
+            if search and search not in self.search_text[contact_id]:
+                continue
+            if offset <= total < offset + limit:
+                page.append(self.by_id[contact_id])
+            total += 1
+        return total, page
+
+    def _sorted_ids(self, sort):
+        key = (sort, self.version)
+        cache = self._sorted
+        if key not in cache:
+            sort_key = SORT_KEYS[sort]
+            # Build a new dict rather than adding to the shared one, which other threads may be reading
+            cache = {k: v for k, v in cache.items() if k[1] == self.version}
+            cache[key] = sorted(self.by_id, key=lambda i: (sort_key(self.by_id[i]), i))
+            self._sorted = cache
+        return cache[key]
+
+    def _index(self, contact):
+        for field in FILTER_FIELDS:
+            self.by_field[field][contact[field]].add(contact['id'])
+        self.search_text[contact['id']] = (
+            f"{contact['first_name']} {contact['last_name']}\n{contact['linkblue']}".lower())
+        scope = primary_scope(contact)
+        if scope is not None:
+            self.primaries[scope].add(contact['id'])
+
+    def _unindex(self, contact):
+        for field in FILTER_FIELDS:
+            ids = self.by_field[field].get(contact[field])
+            if ids is not None:
+                ids.discard(contact['id'])
+                if not ids:
+                    del self.by_field[field][contact[field]]
+        self.search_text.pop(contact['id'], None)
+        scope = primary_scope(contact)
+        ids = self.primaries.get(scope)
+        if ids is not None:
+            ids.discard(contact['id'])
+            if not ids:
+                del self.primaries[scope]
+
+    def _changed(self):
+        self.version += 1
@@ -0,0 +1,208 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def load_evaluation_periods(csv_file_path):
+    """
+    Read evaluation_periods_2025.csv (section_key, start_date, end_date,
+    student_count, duration_hours). Missing student counts count as 0.
+    """
+    periods = pd.read_csv(csv_file_path, parse_dates=['start_date', 'end_date'])
+    periods['student_count'] = periods['student_count'].fillna(0)
+    return periods
+
+
+class LoadProfile:
+    """
+    Hourly view of which evaluations are open, built from prefix sums.
+
+    For every hour boundary ``h`` it keeps the number of students in sections
+    whose evaluation starts before ``h`` and in sections whose evaluation has
+    ended by ``h``. The students affected by a window ``[a, b)`` -- everyone
+    in a section whose evaluation overlaps it -- is then
+    ``started_before[b] - ended_by[a]``, so the cost of every possible
+    placement of a window is one vectorized subtraction. A cumulative sum of
+    hourly load (student-hours) is kept alongside as a secondary measure.
+
+    Args:
+        periods (DataFrame): Output of load_evaluation_periods
+        origin (Timestamp): Start of the timeline, hour 0
+        hours (int): Length of the timeline in hours
+    """
+
+    def __init__(self, periods, origin, hours):
+        self.origin = pd.Timestamp(origin)
+        self.hours = hours
+        weights = periods['student_count'].to_numpy(dtype=float)
+
+        # Hour indexes, clipped to the timeline; periods entirely outside it drop out
+        start = np.floor((periods['start_date'] - self.origin) / HOUR).to_numpy()
+        end = np.ceil((periods['end_date'] - self.origin) / HOUR).to_numpy()
+        inside = (end > 0) & (start < hours) & (end > start)
+        start = np.clip(start[inside], 0, hours).astype(np.int64)
+        end = np.clip(end[inside], 0, hours).astype(np.int64)
+        weights = weights[inside]
+
+        starts_at = np.bincount(start, weights=weights, minlength=hours + 1)
+        ends_at = np.bincount(end, weights=weights, minlength=hours + 1)
+        # started_before[h]: students in sections starting at an hour < h
+        self.started_before = np.concatenate([[0.0], np.cumsum(starts_at)[:-1]])
+        # ended_by[h]: students in sections whose end hour is <= h
+        self.ended_by = np.cumsum(ends_at)
+
+        load = np.cumsum(starts_at - ends_at)[:hours]
+        self.load = load  # students in open evaluations during each hour
+        self.load_prefix = np.concatenate([[0.0], np.cumsum(load)])
+        self.sections = int(inside.sum())
+
+    def to_hour(self, when, round_up=False):
+        offset = (pd.Timestamp(when) - self.origin) / HOUR
+        hour = int(np.ceil(offset) if round_up else np.floor(offset))
+        return min(max(hour, 0), self.hours)
+
+    def to_time(self, hour):
+        return self.origin + hour * HOUR
+
+    def window_costs(self, length):
+        """Affected students and student-hours for a window starting at every hour."""
+        starts = np.arange(self.hours - length + 1)
+        affected = self.started_before[starts + length] - self.ended_by[starts]
+        student_hours = self.load_prefix[starts + length] - self.load_prefix[starts]
+        return affected, student_hours
+
+    def cost(self, start_hour, end_hour):
+        affected = self.started_before[end_hour] - self.ended_by[start_hour]
+        student_hours = self.load_prefix[end_hour] - self.load_prefix[start_hour]
+        return float(affected), float(student_hours)
+
+
+def schedule_windows(profile, lengths, step=1):
+    """
+    Place maintenance windows where they affect the fewest students.
+
+    Windows are placed longest first; each takes the cheapest start (ties
+    broken by fewer student-hours, then earliest) that does not overlap a
+    window already placed. This greedy order is exact for a single window
+    and a good approximation when several are requested.
+
+    Args:
+        profile (LoadProfile): Hourly load timeline
+        lengths (list): Window lengths in hours
+        step (int): Only consider starts on multiples of this many hours
+            (24 keeps windows aligned to midnight)
+
+    Returns:
+        list: One dict per window, in the order requested
+    """
+    taken = np.zeros(profile.hours, dtype=bool)
+    placements = {}
+    for position in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        length = lengths[position]
+        if length > profile.hours:
+            raise ValueError(f"A {length}-hour window does not fit in the {profile.hours}-hour timeline")
+        affected, student_hours = profile.window_costs(length)
+
+        # A start is blocked if any hour of its window is already taken
+        taken_prefix = np.concatenate([[0], np.cumsum(taken)])
+        starts = np.arange(len(affected))
+        allowed = (taken_prefix[starts + length] - taken_prefix[starts] == 0) & (starts % step == 0)
+        if not allowed.any():
+            raise ValueError(f"No room left for a {length}-hour window")
+
+        candidates = np.flatnonzero(allowed)
+        best = candidates[np.lexsort((candidates, student_hours[candidates], affected[candidates]))[0]]
+        taken[best:best + length] = True
+        placements[position] = {
+            'start': profile.to_time(best),
+            'end': profile.to_time(best + length),
+            'duration_hours': length,
+            'affected_students': float(affected[best]),
+            'student_hours': float(student_hours[best]),
+        }
+    return [placements[i] for i in range(len(lengths))]
+
+
+def validate_windows(profile, windows, step=1):
+    """
+    Score existing maintenance windows against the best placement of the same length.
+
+    Args:
+        profile (LoadProfile): Hourly load timeline
+        windows (DataFrame): maintenance_windows_2025.csv rows
+        step (int): Start alignment used for the best placement
+
+    Returns:
+        list: One dict per window with its cost and the best alternative
+    """
+    results = []
+    for row in windows.itertuples(index=False):
+        start = profile.to_hour(row.start_date)
+        end = profile.to_hour(row.end_date, round_up=True)
+        length = max(end - start, 1)
+        affected, student_hours = profile.cost(start, start + length)
+        best = schedule_windows(profile, [length], step=step)[0]
+        results.append({
+            'start': pd.Timestamp(row.start_date),
+            'end': pd.Timestamp(row.end_date),
+            'maintenance_type': getattr(row, 'maintenance_type', ''),
+            'duration_hours': length,
+            'affected_students': affected,
+            'student_hours': student_hours,
+            'best_start': best['start'],
+            'best_affected_students': best['affected_students'],
+        })
+    return results
+
+
+def print_schedule(placements):
+    print("=== PROPOSED MAINTENANCE WINDOWS ===")
+    for window in placements:
+        print(f"{window['duration_hours']:>5}h  {window['start']:%Y-%m-%d %H:%M} to "
+              f"{window['end']:%Y-%m-%d %H:%M}  "
+              f"affects {window['affected_students']:,.0f} students "
+              f"({window['student_hours']:,.0f} student-hours)")
+
+
+def print_validation(results):
+    print("=== EXISTING MAINTENANCE WINDOWS ===")
+    for window in results:
+        verdict = ("optimal" if window['affected_students'] <= window['best_affected_students']
+                   else f"best start {window['best_start']:%Y-%m-%d %H:%M} affects "
+                        f"{window['best_affected_students']:,.0f}")
+        print(f"{window['start']:%Y-%m-%d %H:%M} to {window['end']:%Y-%m-%d %H:%M} "
+              f"({window['maintenance_type']}): affects {window['affected_students']:,.0f} students; {verdict}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Place maintenance windows in low-load evaluation periods.")
+    parser.add_argument('--periods', default='evaluation_periods_2025.csv')
+    parser.add_argument('--windows', default='maintenance_windows_2025.csv',
+                        help="Existing windows to validate ('' to skip)")
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--length', type=int, action='append', default=[],
+                        help="Required window length in hours (repeat for several windows)")
+    parser.add_argument('--step', type=int, default=1,
+                        help="Start alignment in hours, e.g. 24 for midnight starts")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    periods = load_evaluation_periods(args.periods)
+    origin = pd.Timestamp(year=args.year, month=1, day=1)
+    hours = int((pd.Timestamp(year=args.year + 1, month=1, day=1) - origin) / HOUR)
+    profile = LoadProfile(periods, origin, hours)
+    print(f"Built {hours}-hour load timeline from {profile.sections} sections "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.length:
+        started = time.perf_counter()
+        print_schedule(schedule_windows(profile, args.length, step=args.step))
+        print(f"Scheduled in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    if args.windows:
+        print_validation(validate_windows(profile, pd.read_csv(
+            args.windows, parse_dates=['start_date', 'end_date']), step=args.step))
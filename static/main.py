@@ -1,88 +1,109 @@
+import json
+import os
+import sys
 import pandas as pd
-import re
-
-def process_class_number(cls):
-    """Process CLASS numbers to ensure proper spacing for 2-character prefixes"""
-    if pd.isna(cls):
-        return ''
-    
-    # Remove whitespace and split into letters/numbers
-    clean_cls = str(cls).strip().upper()
-    match = re.match(r'^([A-Z]{2,})(\d+)$', clean_cls)  # Find prefix without space
-    
-    if match:
-        prefix = match.group(1)
-        numbers = match.group(2)
-        
-        # Insert space for 2-character prefixes
-        if len(prefix) == 2:
-            return f"{prefix} {numbers}"
-        
-        # Maintain existing spacing for longer prefixes
-        return f"{prefix} {numbers}"
-    
-    # Return original if format doesn't match
-    return clean_cls
-
-# Load courses data
-courses_df = pd.read_csv('Courses.csv')
-
-# Initialize hierarchy list
-hierarchy = []
-
-# 1. Add University Node
-hierarchy.append({
-    'Node Id': 'University',
-    'Node Caption': 'University',
-    'Parent Node Id': '',
-    'Parent Node Caption': '',
-    'Level': 1,
-    'CourseNo': ''
-})
-
-# 2. Process Colleges
-unique_colleges = courses_df[['CLASS_COLLEGE_SHORT', 'CLASS_COLLEGE']].drop_duplicates()
-for _, row in unique_colleges.iterrows():
-    hierarchy.append({
-        'Node Id': row['CLASS_COLLEGE_SHORT'],
-        'Node Caption': row['CLASS_COLLEGE'],
-        'Parent Node Id': 'University',
-        'Parent Node Caption': 'University',
-        'Level': 2,
-        'CourseNo': ''
-    })
-
-# 3. Process Departments
-unique_depts = courses_df[['CLASS_DEPARTMENT_ID', 'CLASS_DEPARTMENT', 
-                          'CLASS_COLLEGE_SHORT', 'CLASS_COLLEGE']].drop_duplicates()
-for _, row in unique_depts.iterrows():
-    hierarchy.append({
-        'Node Id': row['CLASS_DEPARTMENT_ID'],
-        'Node Caption': row['CLASS_DEPARTMENT'],
-        'Parent Node Id': row['CLASS_COLLEGE_SHORT'],
-        'Parent Node Caption': row['CLASS_COLLEGE'],
-        'Level': 3,
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from course_data import load_courses
+from hierarchy import HierarchyIndex, diff_hierarchies, load_hierarchy_csv
+
+HIERARCHY_COLUMNS = ['Node Id', 'Node Caption', 'Parent Node Id',
+                     'Parent Node Caption', 'Level', 'CourseNo']
+
+
+def process_class_numbers(classes):
+    """Normalize a column of CLASS numbers to 'PREFIX NUMBER' (e.g. 'CS115' -> 'CS 115')"""
+    clean = classes.astype('string').str.strip().str.upper()
+    # Prefix of 2+ letters directly followed by digits gets a space; anything else is kept as cleaned
+    parts = clean.str.extract(r'^([A-Z]{2,})(\d+)$')
+    spaced = parts[0] + ' ' + parts[1]
+    return spaced.fillna(clean).fillna('').astype(object)
+
+
+def level_frame(level, node_id, caption, parent_id, parent_caption, course_no=''):
+    """One hierarchy level as a frame; each field is a column of the distinct rows or a constant"""
+    def values(field):
+        return field.astype(object) if isinstance(field, pd.Series) else field
+
+    return pd.DataFrame({
+        'Node Id': values(node_id),
+        'Node Caption': values(caption),
+        'Parent Node Id': values(parent_id),
+        'Parent Node Caption': values(parent_caption),
+        'Level': level,
+        'CourseNo': values(course_no),
+    }, columns=HIERARCHY_COLUMNS)
+
+
+def build_hierarchy(courses_df):
+    """
+    Build the University > College > Department > Class hierarchy.
+
+    Args:
+        courses_df (DataFrame): Course extract with the CLASS_* columns
+
+    Returns:
+        DataFrame: One row per node with HIERARCHY_COLUMNS
+    """
+    # 1. University node
+    university = pd.DataFrame([{
+        'Node Id': 'University',
+        'Node Caption': 'University',
+        'Parent Node Id': '',
+        'Parent Node Caption': '',
+        'Level': 1,
         'CourseNo': ''
-    })
-
-# 4. Process Classes
-unique_classes = courses_df[['CLASS_ID', 'SECTION_TITLE', 'CLASS_DEPARTMENT_ID',
-                            'CLASS_DEPARTMENT', 'CLASS']].drop_duplicates()
-for _, row in unique_classes.iterrows():
-    processed_class = process_class_number(row['CLASS'])
-    hierarchy.append({
-        'Node Id': row['CLASS_ID'],
-        'Node Caption': row['SECTION_TITLE'],
-        'Parent Node Id': row['CLASS_DEPARTMENT_ID'],
-        'Parent Node Caption': row['CLASS_DEPARTMENT'],
-        'Level': 4,
-        'CourseNo': processed_class
-    })
-
-# Create DataFrame and save
-hierarchy_df = pd.DataFrame(hierarchy)
-hierarchy_df = hierarchy_df[['Node Id', 'Node Caption', 'Parent Node Id', 
-                            'Parent Node Caption', 'Level', 'CourseNo']]
-hierarchy_df.to_csv('hierarchy.csv', index=False)
-
-print("Successfully generated hierarchy.csv")
\ No newline at end of file
+    }])
+
+    # 2. Colleges
+    unique_colleges = courses_df[['CLASS_COLLEGE_SHORT', 'CLASS_COLLEGE']].drop_duplicates()
+    colleges = level_frame(2, unique_colleges['CLASS_COLLEGE_SHORT'], unique_colleges['CLASS_COLLEGE'],
+                           'University', 'University')
+
+    # 3. Departments
+    unique_depts = courses_df[['CLASS_DEPARTMENT_ID', 'CLASS_DEPARTMENT',
+                               'CLASS_COLLEGE_SHORT', 'CLASS_COLLEGE']].drop_duplicates()
+    departments = level_frame(3, unique_depts['CLASS_DEPARTMENT_ID'], unique_depts['CLASS_DEPARTMENT'],
+                              unique_depts['CLASS_COLLEGE_SHORT'], unique_depts['CLASS_COLLEGE'])
+
+    # 4. Classes
+    unique_classes = courses_df[['CLASS_ID', 'SECTION_TITLE', 'CLASS_DEPARTMENT_ID',
+                                 'CLASS_DEPARTMENT', 'CLASS']].drop_duplicates()
+    classes = level_frame(4, unique_classes['CLASS_ID'], unique_classes['SECTION_TITLE'],
+                          unique_classes['CLASS_DEPARTMENT_ID'], unique_classes['CLASS_DEPARTMENT'],
+                          process_class_numbers(unique_classes['CLASS']))
+
+    return pd.concat([university, colleges, departments, classes], ignore_index=True)
+
+
+def write_hierarchy(hierarchy_df, path='hierarchy.csv', diff_path='hierarchy_diff.json'):
+    """
+    Replace ``path`` with the new hierarchy and write what changed to ``diff_path``.
+
+    The CSV is written next to the old one and renamed over it, so a running
+    app that reloads on file change never reads a half-written file.
+
+    Returns:
+        dict: Added, removed and renamed nodes (see hierarchy.diff_hierarchies)
+    """
+    tmp_path = path + '.tmp'
+    hierarchy_df.to_csv(tmp_path, index=False)
+    previous = load_hierarchy_csv(path) if os.path.exists(path) else HierarchyIndex()
+    diff = diff_hierarchies(previous, load_hierarchy_csv(tmp_path))
+    with open(diff_path, 'w') as f:
+        json.dump(diff, f, indent=2)
+    os.replace(tmp_path, path)
+    return diff
+
+
+if __name__ == "__main__":
+    # Load courses data (typed, from the shared parse cache)
+    courses_df = load_courses('Courses.csv')
+
+    hierarchy_df = build_hierarchy(courses_df)
+    diff = write_hierarchy(hierarchy_df)
+
+    print("Successfully generated hierarchy.csv")
+    print(f"Changes: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+          f"{len(diff['renamed'])} renamed, {len(diff['duplicates'])} repeated node keys "
+          f"(see hierarchy_diff.json)")
@@ -0,0 +1,102 @@
+// Shared by the add and edit contact forms
+
+// Departments are fetched per college on demand and kept for the life of the page
+const departmentCache = new Map();
+
+function fetchDepartments(collegeId) {
+    if(!departmentCache.has(collegeId)) {
+        departmentCache.set(collegeId,
+            fetch(`/api/hierarchy/colleges/${encodeURIComponent(collegeId)}/departments`)
+                .then(response => response.json()));
+    }
+    return departmentCache.get(collegeId);
+}
+
+// Returns updateDepartments(): refills the department select for the selected college
+function departmentLoader(contactType, collegeSelect, deptSelect) {
+    let departmentRequest = 0;
+
+    return async function updateDepartments() {
+        const requestId = ++departmentRequest;
+        const selected = collegeSelect.selectedOptions[0];
+        let depts = [];
+        if(contactType.value === 'Department' && selected && selected.dataset.id) {
+            depts = await fetchDepartments(selected.dataset.id);
+        }
+        // A newer call has taken over while this one was waiting
+        if(requestId !== departmentRequest) return;
+
+        deptSelect.innerHTML = '<option value="">Select Department</option>';
+        depts.forEach(dept => {
+            const option = new Option(dept.caption, dept.caption);
+            option.dataset.id = dept.node_id;
+            deptSelect.add(option);
+        });
+    };
+}
+
+async function typeaheadSearch(kind, query, scope) {
+    const params = new URLSearchParams({ kind, q: query, scope, limit: 10 });
+    const response = await fetch(`/api/typeahead?${params}`);
+    return response.json();
+}
+
+function fillDatalist(id, values) {
+    const list = document.getElementById(id);
+    list.innerHTML = '';
+    values.forEach(value => list.appendChild(new Option(value)));
+}
+
+// Course coordinator typeahead: suggest and check prefix/course against the selected department.
+// A prefix is accepted when the department has courses with it, the same rule the server applies
+function setupCourseTypeahead(deptSelect, courseCoordinator) {
+    const prefixInput = document.getElementById('prefix');
+    const courseInput = document.getElementById('course');
+    const courseFeedback = document.getElementById('courseFeedback');
+    let typeaheadTimer = null;
+
+    async function checkCourseFields() {
+        const dept = deptSelect.selectedOptions[0];
+        const prefix = prefixInput.value.trim().toUpperCase();
+        const course = courseInput.value.trim();
+        if(!courseCoordinator.checked || !dept || !dept.dataset.id || !prefix) {
+            courseFeedback.textContent = '';
+            return;
+        }
+
+        const prefixes = await typeaheadSearch('prefix', prefix, dept.dataset.id);
+        fillDatalist('prefixOptions', prefixes.map(p => p.prefix));
+        const match = prefixes.find(p => p.prefix === prefix);
+        if(!match) {
+            courseFeedback.textContent = `No ${prefix} courses in ${dept.value}`;
+            courseFeedback.className = 'form-text mb-3 text-danger';
+            return;
+        }
+
+        const courses = await typeaheadSearch('course', `${prefix} ${course}`, dept.dataset.id);
+        const numbers = courses
+            .filter(c => c.course_no.split(/\s+/)[0].toUpperCase() === prefix)
+            .map(c => ({ number: c.course_no.split(/\s+/)[1], caption: c.caption }));
+        fillDatalist('courseOptions', numbers.map(c => c.number));
+        const exact = numbers.find(c => c.number === course);
+        if(!course) {
+            courseFeedback.textContent = `All ${match.courses} ${prefix} courses in ${dept.value}`;
+            courseFeedback.className = 'form-text mb-3 text-success';
+        } else if(exact) {
+            courseFeedback.textContent = `${prefix} ${course}: ${exact.caption}`;
+            courseFeedback.className = 'form-text mb-3 text-success';
+        } else {
+            courseFeedback.textContent = numbers.length
+                ? `Keep typing: ${numbers.length} matching ${prefix} courses`
+                : `Course ${prefix} ${course} not found in department`;
+            courseFeedback.className = numbers.length ? 'form-text mb-3' : 'form-text mb-3 text-danger';
+        }
+    }
+
+    [prefixInput, courseInput].forEach(input => {
+        input.addEventListener('input', () => {
+            clearTimeout(typeaheadTimer);
+            typeaheadTimer = setTimeout(checkCourseFields, 150);
+        });
+    });
+}
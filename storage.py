@@ -0,0 +1,468 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CONTACTS_FIELDS = [
+    'id', 'linkblue', 'first_name', 'last_name', 'primary_contact',
+    'contact_type', 'college', 'department', 'course', 'prefix', 'level_type'
+]
+
+
+def contact_from_row(row):
+    """Convert a contacts.csv row (all strings) into an app contact dict."""
+    return {
+        'id': int(row['id']),
+        'linkblue': row['linkblue'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        # Older files say yes/no, the app has always written true/false
+        'primary_contact': str(row['primary_contact']).lower() in ('yes', 'true', '1'),
+        'contact_type': row['contact_type'],
+        'college': row['college'],
+        'department': row['department'],
+        'course': row['course'] or '',
+        'prefix': row['prefix'] or '',
+        'level_type': row['level_type']
+    }
+
+
+def row_from_contact(contact):
+    """Convert a contact dict into a contacts.csv row."""
+    row = {field: contact.get(field, '') for field in CONTACTS_FIELDS}
+    row['primary_contact'] = str(bool(row['primary_contact'])).lower()
+    return row
+
+
+def read_contacts_csv(path):
+    with open(path, 'r', newline='') as f:
+        return [contact_from_row(row) for row in csv.DictReader(f)]
+
+
+class FileLock:
+    """
+    Exclusive lock on a sidecar file, held by one process (and thread) at a time.
+
+    Every worker process that opens the same store locks the same file, so
+    their read-modify-write cycles on the contacts run one after another.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after 10 seconds; keep waiting
+                    pass
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def write_contacts_csv(path, contacts):
+    _write_atomic(path, lambda f: _write_contacts(f, contacts))
+
+
+class CsvContactStore:
+    """
+    Contacts kept in contacts.csv plus an append-only change journal.
+
+    Each add, edit or delete appends one JSON line to ``<path>.journal`` and
+    fsyncs it, so a request writes a few hundred bytes instead of the whole
+    file. Once the journal holds ``compact_every`` records it is folded back
+    into contacts.csv by writing a temporary file and renaming it over the
+    original, so a crash at any point leaves either the old or the new file,
+    never a truncated one. Replaying the journal is idempotent, so a crash
+    between the rename and the journal reset is also harmless.
+
+    Several processes can share the files: writes are made under ``lock()``,
+    and ``stale()`` tells a process that another one has written since it
+    last loaded, by comparing the files' identity, size and mtime.
+    """
+
+    COMPACT_EVERY = 200
+
+    def __init__(self, path, compact_every=None):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.seq_path = path + '.seq'  # Highest id ever issued, so deleted ids are not reused
+        self.compact_every = compact_every or self.COMPACT_EVERY
+        self._contacts = {}
+        self._next_id = 1
+        self._journal_entries = 0
+        self._signature = None  # Files as this process last left them
+
+    def lock(self):
+        return FileLock(self.path + '.lock')
+
+    def stale(self):
+        return self._file_signature() != self._signature
+
+    def _file_signature(self):
+        signature = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load_all(self):
+        try:
+            contacts = read_contacts_csv(self.path)
+        except FileNotFoundError:
+            contacts = []
+        self._contacts = {c['id']: c for c in contacts}
+        self._next_id = max(self._read_seq(), max(self._contacts, default=0) + 1)
+        self._journal_entries = self._replay_journal()
+        self._maybe_compact()
+        self._signature = self._file_signature()
+        return [dict(c) for c in self._contacts.values()]
+
+    def next_id(self):
+        return self._next_id
+
+    def insert(self, contact):
+        self._append({'op': 'insert', 'contact': row_from_contact(contact)})
+        self._apply_insert(dict(contact))
+        self._maybe_compact()
+        self._signature = self._file_signature()
+
+    def insert_many(self, contacts):
+        # One journal record for the whole batch: after a crash it is replayed entirely or not at all
+        self._append({'op': 'insert_many', 'contacts': [row_from_contact(c) for c in contacts]},
+                     entries=len(contacts))
+        for contact in contacts:
+            self._apply_insert(dict(contact))
+        self._maybe_compact()
+        self._signature = self._file_signature()
+
+    def update(self, contact):
+        self._append({'op': 'update', 'contact': row_from_contact(contact)})
+        self._contacts[contact['id']] = dict(contact)
+        self._maybe_compact()
+        self._signature = self._file_signature()
+
+    def delete(self, contact_id):
+        self._append({'op': 'delete', 'id': contact_id})
+        self._contacts.pop(contact_id, None)
+        self._maybe_compact()
+        self._signature = self._file_signature()
+
+    def replace_all(self, contacts):
+        self._contacts = {}
+        for contact in contacts:
+            self._apply_insert(dict(contact))
+        self.compact()
+        self._signature = self._file_signature()
+
+    def compact(self):
+        """Fold the journal into contacts.csv with an atomic rename."""
+        _write_atomic(self.path, lambda f: _write_contacts(f, self._contacts.values()))
+        _write_atomic(self.seq_path, lambda f: f.write(str(self._next_id)))
+        with open(self.journal_path, 'w'):
+            pass
+        self._journal_entries = 0
+
+    def _apply_insert(self, contact):
+        self._contacts[contact['id']] = contact
+        if contact['id'] >= self._next_id:
+            self._next_id = contact['id'] + 1
+
+    def _append(self, record, entries=1):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with open(self.journal_path, 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_entries += entries
+
+    def _maybe_compact(self):
+        if self._journal_entries >= self.compact_every:
+            self.compact()
+
+    def _read_seq(self):
+        try:
+            with open(self.seq_path, 'r') as f:
+                return int(f.read().strip() or 1)
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def _replay_journal(self):
+        entries = 0
+        good_bytes = 0
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('unterminated record')
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash mid-append can only tear the final record, which was never acknowledged
+                    metrics.log('journal_record_dropped',
+                                f"Dropping incomplete record at end of {self.journal_path}",
+                                journal=self.journal_path)
+                    break
+                if record['op'] == 'delete':
+                    self._contacts.pop(record['id'], None)
+                elif record['op'] == 'insert':
+                    self._apply_insert(contact_from_row(record['contact']))
+                elif record['op'] == 'insert_many':
+                    for row in record['contacts']:
+                        self._apply_insert(contact_from_row(row))
+                else:
+                    contact = contact_from_row(record['contact'])
+                    self._contacts[contact['id']] = contact
+                entries += 1
+                good_bytes += len(line)
+            torn = f.read(1) != b'' or f.tell() != good_bytes
+        if torn:
+            # Cut the torn tail so later appends start on a clean line
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_bytes)
+        return entries
+
+
+def _write_contacts(f, contacts):
+    writer = csv.DictWriter(f, fieldnames=CONTACTS_FIELDS)
+    writer.writeheader()
+    for contact in contacts:
+        writer.writerow(row_from_contact(contact))
+
+
+@contextmanager
+def atomic_file(path):
+    """
+    Open a temporary sibling of ``path`` for writing; when the block completes it
+    is fsynced and renamed over ``path``, so readers never see a partial file.
+    If the block raises (or a generator writing inside it is closed early) the
+    temporary file is removed and ``path`` is left as it was. A new file gets
+    mode 0644; a replaced one keeps its mode.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'w', newline='') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_atomic(path, write):
+    with atomic_file(path) as f:
+        write(f)
+
+
+class SqliteContactStore:
+    """
+    Contacts kept in SQLite (WAL mode), one row per contact. Each add, edit or
+    delete is a single-row statement in its own transaction, so concurrent
+    writers cannot overwrite each other's changes with a stale full copy.
+
+    Every write also bumps a generation counter in the same transaction;
+    ``stale()`` compares it with the generation this process last saw, so
+    workers notice each other's changes without reloading on every request.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY,
+            linkblue TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            primary_contact INTEGER NOT NULL DEFAULT 0,
+            contact_type TEXT NOT NULL,
+            college TEXT NOT NULL,
+            department TEXT NOT NULL DEFAULT '',
+            course TEXT NOT NULL DEFAULT '',
+            prefix TEXT NOT NULL DEFAULT '',
+            level_type TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_contacts_linkblue ON contacts (linkblue);
+        CREATE INDEX IF NOT EXISTS idx_contacts_college ON contacts (college);
+        CREATE INDEX IF NOT EXISTS idx_contacts_department ON contacts (college, department);
+        CREATE TABLE IF NOT EXISTS contact_seq (
+            name TEXT PRIMARY KEY,
+            next_id INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS contact_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        );
+    """
+    RECORD_ID = """
+        INSERT INTO contact_seq (name, next_id) VALUES ('contacts', ?)
+        ON CONFLICT (name) DO UPDATE SET next_id = MAX(next_id, excluded.next_id)
+    """
+    BUMP_GENERATION = """
+        INSERT INTO contact_generation (id, generation) VALUES (1, 1)
+        ON CONFLICT (id) DO UPDATE SET generation = generation + 1
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._generation = None  # Last generation this process loaded or wrote
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def lock(self):
+        return FileLock(self.path + '.lock')
+
+    def stale(self):
+        return self._read_generation() != self._generation
+
+    def _read_generation(self):
+        row = self._connect().execute(
+            "SELECT generation FROM contact_generation WHERE id = 1").fetchone()
+        return row['generation'] if row else 0
+
+    def _bump(self, conn):
+        conn.execute(self.BUMP_GENERATION)
+        self._generation = conn.execute(
+            "SELECT generation FROM contact_generation WHERE id = 1").fetchone()[0]
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def load_all(self):
+        # Generation first: a write landing in between only causes one extra reload later
+        self._generation = self._read_generation()
+        cursor = self._connect().execute(
+            f"SELECT {', '.join(CONTACTS_FIELDS)} FROM contacts ORDER BY id")
+        return [contact_from_row(row) for row in cursor]
+
+    def next_id(self):
+        row = self._connect().execute(
+            "SELECT next_id FROM contact_seq WHERE name = 'contacts'").fetchone()
+        return row['next_id'] if row else 1
+
+    def _values(self, contact):
+        row = row_from_contact(contact)
+        row['primary_contact'] = 1 if contact.get('primary_contact') else 0
+        return [row[field] for field in CONTACTS_FIELDS]
+
+    def insert(self, contact):
+        placeholders = ', '.join('?' for _ in CONTACTS_FIELDS)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO contacts ({', '.join(CONTACTS_FIELDS)}) VALUES ({placeholders})",
+                self._values(contact))
+            conn.execute(self.RECORD_ID, (contact['id'] + 1,))
+            self._bump(conn)
+
+    def insert_many(self, contacts):
+        placeholders = ', '.join('?' for _ in CONTACTS_FIELDS)
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO contacts ({', '.join(CONTACTS_FIELDS)}) VALUES ({placeholders})",
+                [self._values(c) for c in contacts])
+            conn.execute(self.RECORD_ID, (max(c['id'] for c in contacts) + 1,))
+            self._bump(conn)
+
+    def update(self, contact):
+        fields = CONTACTS_FIELDS[1:]
+        values = self._values(contact)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE contacts SET {', '.join(f'{f} = ?' for f in fields)} WHERE id = ?",
+                values[1:] + values[:1])
+            self._bump(conn)
+
+    def delete(self, contact_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
+            self._bump(conn)
+
+    def replace_all(self, contacts):
+        placeholders = ', '.join('?' for _ in CONTACTS_FIELDS)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM contacts")
+            conn.executemany(
+                f"INSERT INTO contacts ({', '.join(CONTACTS_FIELDS)}) VALUES ({placeholders})",
+                [self._values(c) for c in contacts])
+            if contacts:
+                conn.execute(self.RECORD_ID, (max(c['id'] for c in contacts) + 1,))
+            self._bump(conn)
+
+
+def open_store(backend, csv_path, db_path):
+    if backend == 'sqlite':
+        return SqliteContactStore(db_path)
+    if backend == 'csv':
+        return CsvContactStore(csv_path)
+    raise ValueError(f"Unknown contacts backend: {backend}")
+
+
+def import_csv(csv_path, db_path):
+    """One-shot import of an existing contacts.csv into a SQLite database."""
+    contacts = read_contacts_csv(csv_path)
+    SqliteContactStore(db_path).replace_all(contacts)
+    return len(contacts)
+
+
+def export_csv(db_path, csv_path):
+    """Write the SQLite contacts back out in contacts.csv format."""
+    contacts = SqliteContactStore(db_path).load_all()
+    write_contacts_csv(csv_path, contacts)
+    return len(contacts)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 4) or sys.argv[1] not in ('import', 'export'):
+        print("Usage: python storage.py import|export [contacts.csv contacts.db]")
+        sys.exit(1)
+    csv_file, db_file = sys.argv[2:4] if len(sys.argv) == 4 else ('contacts.csv', 'contacts.db')
+    if sys.argv[1] == 'import':
+        count = import_csv(csv_file, db_file)
+        print(f"Imported {count} contacts from {csv_file} into {db_file}")
+    else:
+        count = export_csv(db_file, csv_file)
+        print(f"Exported {count} contacts from {db_file} to {csv_file}")
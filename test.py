@@ -1,6 +1,8 @@
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
+from intervals import evaluation_gaps
+from course_data import load_courses
 
 def calculate_longest_evaluation_gap(csv_file_path):
     """
@@ -15,7 +17,8 @@ def calculate_longest_evaluation_gap(csv_file_path):
     
     # Read the CSV file
     try:
-        df = pd.read_csv(csv_file_path)
+        df = load_courses(csv_file_path,
+                          columns=['SECTION_KEY', 'ACADEMIC_TERM', 'TCE_INVITE', 'TCE_END_DATE'])
     except FileNotFoundError:
         print(f"Error: File '{csv_file_path}' not found.")
         return None
@@ -28,74 +31,7 @@ def calculate_longest_evaluation_gap(csv_file_path):
         print("No valid evaluation data found.")
         return None
     
-    # Convert date columns to datetime
-    df_clean['TCE_INVITE'] = pd.to_datetime(df_clean['TCE_INVITE'])
-    df_clean['TCE_END_DATE'] = pd.to_datetime(df_clean['TCE_END_DATE'])
-    
-    # Create evaluation periods (each course has an evaluation period from invite to end)
-    evaluation_periods = []
-    
-    for _, row in df_clean.iterrows():
-        evaluation_periods.append({
-            'course': row['SECTION_KEY'],
-            'start': row['TCE_INVITE'],
-            'end': row['TCE_END_DATE'],
-            'term': row['ACADEMIC_TERM']
-        })
-    
-    # Sort evaluation periods by start date
-    evaluation_periods.sort(key=lambda x: x['start'])
-    
-    # Find gaps between evaluation periods
-    gaps = []
-    
-    for i in range(len(evaluation_periods) - 1):
-        current_end = evaluation_periods[i]['end']
-        next_start = evaluation_periods[i + 1]['start']
-        
-        # Check if there's a gap (next evaluation starts after current one ends)
-        if next_start > current_end:
-            gap_duration = (next_start - current_end).days
-            gaps.append({
-                'gap_start': current_end,
-                'gap_end': next_start,
-                'duration_days': gap_duration,
-                'previous_course': evaluation_periods[i]['course'],
-                'next_course': evaluation_periods[i + 1]['course'],
-                'previous_term': evaluation_periods[i]['term'],
-                'next_term': evaluation_periods[i + 1]['term']
-            })
-    
-    if not gaps:
-        return {
-            'longest_gap_days': 0,
-            'message': 'No gaps found - evaluation periods overlap or are continuous',
-            'total_evaluation_periods': len(evaluation_periods),
-            'date_range': f"{evaluation_periods[0]['start'].date()} to {evaluation_periods[-1]['end'].date()}"
-        }
-    
-    # Find the longest gap
-    longest_gap = max(gaps, key=lambda x: x['duration_days'])
-    
-    # Calculate summary statistics
-    total_gap_days = sum(gap['duration_days'] for gap in gaps)
-    average_gap_days = total_gap_days / len(gaps) if gaps else 0
-    
-    return {
-        'longest_gap_days': longest_gap['duration_days'],
-        'longest_gap_start': longest_gap['gap_start'].date(),
-        'longest_gap_end': longest_gap['gap_end'].date(),
-        'previous_course': longest_gap['previous_course'],
-        'next_course': longest_gap['next_course'],
-        'previous_term': longest_gap['previous_term'],
-        'next_term': longest_gap['next_term'],
-        'total_gaps_found': len(gaps),
-        'total_gap_days': total_gap_days,
-        'average_gap_days': round(average_gap_days, 1),
-        'all_gaps': gaps,
-        'total_evaluation_periods': len(evaluation_periods),
-        'evaluation_date_range': f"{evaluation_periods[0]['start'].date()} to {evaluation_periods[-1]['end'].date()}"
-    }
+    return evaluation_gaps(df_clean)
 
 def print_gap_analysis(results):
     """Print a formatted analysis of the evaluation gaps."""
@@ -120,6 +56,7 @@ def print_gap_analysis(results):
     print(f"Total gaps found: {results['total_gaps_found']}")
     print(f"Total days without evaluations: {results['total_gap_days']} days")
     print(f"Average gap length: {results['average_gap_days']} days")
+    print(f"Median gap length: {results['median_gap_days']} days")
     print(f"Total evaluation periods: {results['total_evaluation_periods']}")
     print(f"Evaluation date range: {results['evaluation_date_range']}")
     
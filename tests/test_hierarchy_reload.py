@@ -0,0 +1,90 @@
+"""
+Reloading hierarchy.csv while it is being rewritten keeps the loaded version.
+"""
+import importlib
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = 'Node Id,Node Caption,Parent Node Id,Parent Node Caption,Level,CourseNo\n'
+ROWS = [
+    'University,University,,,1,\n',
+    '8E000,Arts and Sciences,University,University,2,\n',
+    '98017730,Chemistry,8E000,Arts and Sciences,3,\n',
+    '98017731,General Chemistry,98017730,Chemistry,4,CHE 105\n',
+]
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app, loaded from a small hierarchy.csv and a copy of contacts.csv in tmp_path."""
+    paths = {
+        'HIERARCHY_CSV': str(tmp_path / 'hierarchy.csv'),
+        'CONTACTS_CSV': str(tmp_path / 'contacts.csv'),
+        'EXPORT_SNAPSHOT': str(tmp_path / 'export_snapshot.csv'),
+    }
+    (tmp_path / 'hierarchy.csv').write_text(HEADER + ''.join(ROWS))
+    shutil.copy(f"{ROOT}/contacts.csv", paths['CONTACTS_CSV'])
+    for name, path in paths.items():
+        monkeypatch.setenv(name, path)
+    monkeypatch.setenv('CONTACTS_BACKEND', 'csv')
+    monkeypatch.setenv('HIERARCHY_CHECK_SECONDS', '0')
+
+    first_import = 'app' not in sys.modules
+    app = importlib.import_module('app')
+    if not first_import:
+        for name, path in paths.items():
+            monkeypatch.setattr(app, name, path)
+        monkeypatch.setattr(app, 'HIERARCHY_CHECK_SECONDS', 0.0)
+        monkeypatch.setattr(app, 'store', None)
+        app.load_hierarchy()
+        app.load_contacts()
+    app.app.testing = True
+    return app
+
+
+@pytest.mark.parametrize('tail', [
+    '98017740,"SPEC',     # Cut off inside a quoted field
+    '98017740,Speci',     # Cut off part way through a row
+    '98017740,Special,98017730,Chemistry,four,\n',  # Not a level
+], ids=['open-quote', 'short-row', 'bad-level'])
+def test_reload_from_truncated_file_keeps_loaded_version(app_module, tail):
+    loaded = app_module.hierarchy
+    with open(app_module.HIERARCHY_CSV, 'a') as f:
+        f.write(tail)
+
+    response = app_module.app.test_client().post('/admin/reload-hierarchy')
+    assert response.status_code == 500
+    summary = response.get_json()
+    assert summary['status'] == 'error'
+    assert summary['version'] == loaded.version
+    assert 'line 6' in summary['error']
+    assert app_module.hierarchy is loaded
+    assert app_module.hierarchy.get('98017731') is not None
+
+
+def test_reload_from_emptied_file_keeps_loaded_version(app_module):
+    loaded = app_module.hierarchy
+    with open(app_module.HIERARCHY_CSV, 'w') as f:
+        f.write(HEADER)
+
+    summary = app_module.reload_hierarchy()
+    assert summary['status'] == 'error'
+    assert app_module.hierarchy is loaded
+
+
+def test_reload_after_rewrite_finishes(app_module):
+    loaded = app_module.hierarchy
+    with open(app_module.HIERARCHY_CSV, 'a') as f:
+        f.write('98017740,"SPEC')
+    assert app_module.reload_hierarchy()['status'] == 'error'
+
+    with open(app_module.HIERARCHY_CSV, 'w') as f:
+        f.write(HEADER + ''.join(ROWS) + '98017740,Special Topics,98017730,Chemistry,4,CHE 395\n')
+    summary = app_module.reload_hierarchy()
+    assert (summary['status'], summary['added']) == ('reloaded', 1)
+    assert app_module.hierarchy is not loaded
@@ -0,0 +1,138 @@
+"""
+intervals.py checked against brute-force scans of random integer intervals.
+
+Intervals are half-open [start, end) with whole-number endpoints, so a
+brute-force answer can be read off the unit cells [t, t + 1) they cover.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from intervals import CoverageTimeline, coverage_gaps, evaluation_gaps, gap_summary, overlaps_per_bin
+
+SPAN = 200
+
+
+def random_intervals(seed, count):
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, SPAN, count)
+    ends = starts + rng.integers(1, 40, count)
+    return starts, ends
+
+
+def covered_cells(starts, ends, limit):
+    covered = np.zeros(limit, dtype=bool)
+    for start, end in zip(starts, ends):
+        covered[start:end] = True
+    return covered
+
+
+def idle_runs(covered, first, last):
+    """Maximal runs of uncovered cells in [first, last), as (start, end) pairs."""
+    runs = []
+    t = first
+    while t < last:
+        if covered[t]:
+            t += 1
+            continue
+        run_start = t
+        while t < last and not covered[t]:
+            t += 1
+        runs.append((run_start, t))
+    return runs
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_coverage_gaps_match_brute_force(seed):
+    starts, ends = random_intervals(seed, count=1 + seed)
+    gaps = coverage_gaps(starts, ends)
+
+    covered = covered_cells(starts, ends, SPAN + 40)
+    expected = idle_runs(covered, starts.min(), ends.max())
+    assert list(zip(gaps['start'].tolist(), gaps['end'].tolist())) == expected
+    # The intervals either side of each gap are the ones that open and close it
+    assert (ends[gaps['previous']] == gaps['start']).all()
+    assert (starts[gaps['next']] == gaps['end']).all()
+    assert (starts[gaps['previous']] < gaps['start']).all()
+
+
+def test_long_interval_covering_later_ones_leaves_no_gap():
+    # Neighbour-only comparison used to report 3..4 as a gap here
+    gaps = coverage_gaps([0, 1, 4, 20], [10, 3, 5, 21])
+    assert gaps['start'].tolist() == [10]
+    assert gaps['end'].tolist() == [20]
+    assert gaps['previous'].tolist() == [0]
+    assert gaps['next'].tolist() == [3]
+
+
+def test_gap_summary():
+    summary = gap_summary(coverage_gaps([0, 5, 20], [2, 10, 21]), unit=1)
+    assert summary['durations'].tolist() == [3, 10]
+    assert (summary['count'], summary['total'], summary['longest']) == (2, 13, 1)
+    assert summary['mean'] == 6.5
+    assert gap_summary(coverage_gaps([0], [1]), unit=1)['count'] == 0
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_timeline_active_at_matches_brute_force(seed):
+    starts, ends = random_intervals(seed, count=1 + seed)
+    timeline = CoverageTimeline(starts, ends)
+
+    times = np.arange(-5, SPAN + 50)
+    expected = [int(((starts <= t) & (t < ends)).sum()) for t in times]
+    assert timeline.active_at(times).tolist() == expected
+    assert int(timeline.active_at(int(starts[0]))) == expected[starts[0] + 5]
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_timeline_downtime_matches_brute_force(seed):
+    starts, ends = random_intervals(seed, count=seed // 2)
+    timeline = CoverageTimeline(starts, ends)
+    rng = np.random.default_rng(1000 + seed)
+    range_start, range_end = sorted(int(x) for x in rng.integers(-10, SPAN + 50, 2))
+    min_duration = int(rng.integers(1, 4))
+
+    covered = np.zeros(SPAN + 100, dtype=bool)
+    covered[10:] = covered_cells(starts, ends, SPAN + 90)  # Shifted by 10 so negative times fit
+    expected = [(start - 10, end - 10)
+                for start, end in idle_runs(covered, range_start + 10, range_end + 10)
+                if end - start >= min_duration]
+    result = timeline.downtime(range_start, range_end, min_duration=min_duration)
+    assert [(int(start), int(end)) for start, end in result] == expected
+
+
+def test_timeline_idle_periods_are_the_coverage_gaps():
+    starts, ends = random_intervals(7, count=30)
+    timeline = CoverageTimeline(starts, ends)
+    gaps = coverage_gaps(starts, ends)
+    assert timeline.idle_starts.tolist() == gaps['start'].tolist()
+    assert timeline.idle_ends.tolist() == gaps['end'].tolist()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_overlaps_per_bin_matches_brute_force(seed):
+    starts, ends = random_intervals(seed, count=5 + seed)
+    weights = np.random.default_rng(seed).integers(0, 50, len(starts))
+    edges = np.arange(0, SPAN + 50, 7)
+
+    counts = overlaps_per_bin(starts, ends, edges)
+    weighted = overlaps_per_bin(starts, ends, edges, weights)
+    for i, (low, high) in enumerate(zip(edges[:-1], edges[1:])):
+        overlapping = (starts < high) & (ends > low)
+        assert counts[i] == overlapping.sum()
+        assert weighted[i] == weights[overlapping].sum()
+
+
+def test_evaluation_gaps_report():
+    df = pd.DataFrame({
+        'SECTION_KEY': ['A', 'B', 'C', 'D'],
+        'ACADEMIC_TERM': ['Fall', 'Fall', 'Fall', 'Spring'],
+        'TCE_INVITE': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-20', '2025-03-01']),
+        'TCE_END_DATE': pd.to_datetime(['2025-01-15', '2025-01-05', '2025-01-25', '2025-03-10']),
+    })
+    results = evaluation_gaps(df)
+    assert results['total_gaps_found'] == 2
+    assert results['longest_gap_days'] == 35
+    assert (results['previous_course'], results['next_course']) == ('C', 'D')
+    assert [gap['duration_days'] for gap in results['all_gaps']] == [5, 35]
+    assert results['all_gaps'][0]['previous_course'] == 'A'
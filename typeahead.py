@@ -0,0 +1,103 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+from hierarchy import normalize_course_no
+
+KINDS = ('course', 'department', 'prefix')
+
+
+def normalize_query(text):
+    return ' '.join(text.split()).upper()
+
+
+class TypeaheadIndex:
+    """
+    Sorted-array prefix search over course numbers, course titles,
+    department names and course prefixes from the hierarchy.
+
+    Every searchable string is stored as an upper-cased key next to the item
+    it points at, sorted once when the hierarchy is loaded. A lookup is a
+    bisect to the first key starting with the query followed by a short walk,
+    so the cost depends on the number of results rather than the hierarchy
+    size. Each kind is indexed globally and per parent (department for
+    courses and prefixes, college for departments) so a scoped search never
+    has to skip over other departments' entries.
+    """
+
+    def __init__(self, hierarchy):
+        keys = defaultdict(list)  # (kind, scope id or None) -> keys, in step with items
+        items = defaultdict(list)
+
+        def add_all(kind, scope, new_keys, item):
+            # Each key goes into the global list and the scope's list
+            for scoped in ((kind, None), (kind, scope)):
+                keys[scoped].extend(new_keys)
+                items[scoped].extend([item] * len(new_keys))
+
+        for dept in hierarchy.at_level(3):
+            item = {'node_id': dept['node_id'], 'caption': dept['caption'],
+                    'college_id': dept['parent_id']}
+            add_all('department', dept['parent_id'], _word_keys(dept['caption']), item)
+
+        prefixes = {}
+        for course in hierarchy.at_level(4):
+            dept_id = course['parent_id']
+            item = {'node_id': course['node_id'], 'caption': course['caption'],
+                    'course_no': course['course_no'], 'department_id': dept_id}
+            course_no = normalize_course_no(course['course_no'])
+            course_keys = _word_keys(course['caption'])
+            if course_no:
+                course_keys += [course_no, course_no.replace(' ', '')]
+            add_all('course', dept_id, course_keys, item)
+
+            if course['prefix'] and (dept_id, course['prefix']) not in prefixes:
+                prefixes[(dept_id, course['prefix'])] = {
+                    'prefix': course['prefix'], 'department_id': dept_id,
+                    'courses': len(hierarchy.courses_for_prefix(dept_id, course['prefix']))}
+        for (dept_id, prefix), item in prefixes.items():
+            add_all('prefix', dept_id, [prefix], item)
+
+        # One sort of positions per list; the keys are plain strings, so no per-pair tuples or key lambdas
+        self._keys = {}
+        self._items = {}
+        for scope, scope_keys in keys.items():
+            order = sorted(range(len(scope_keys)), key=scope_keys.__getitem__)
+            scope_items = items[scope]
+            self._keys[scope] = list(map(scope_keys.__getitem__, order))
+            self._items[scope] = list(map(scope_items.__getitem__, order))
+
+    def search(self, query, kind='course', scope=None, limit=10):
+        """
+        Return up to ``limit`` items of ``kind`` with a key starting with ``query``.
+
+        Args:
+            query (str): Text typed so far; case and repeated spaces are ignored
+            kind (str): One of KINDS
+            scope (str): Optional department id (courses, prefixes) or college id (departments)
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Matching items in key order, each item at most once
+        """
+        query = normalize_query(query)
+        keys = self._keys.get((kind, scope))
+        if not query or not keys:
+            return []
+        items = self._items[(kind, scope)]
+
+        results = []
+        seen = set()
+        i = bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query) and len(results) < limit:
+            item = items[i]
+            if id(item) not in seen:
+                seen.add(id(item))
+                results.append(item)
+            i += 1
+        return results
+
+
+def _word_keys(caption):
+    """Keys for a caption so it matches from the start of any word: 'HIST OF DANCE', 'OF DANCE', 'DANCE'."""
+    words = normalize_query(caption).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]